@@ -1,5 +1,13 @@
+import cProfile
+import heapq
+import math
+import time
+import tracemalloc
+from itertools import count
 from heuristics import Heuristic
 from state import State
+from repr import Repr
+from stats import SearchStats
 
 
 def get_elem_from_list(l: list, state: State) -> State | None:
@@ -20,20 +28,72 @@ def reconstruct_path(state: State) -> list:
 
 
 class Algorithm:
+    status = False
+    interval = 1.0
+    stats = None
+
     def __init__(self, heuristic: Heuristic):
         pass
 
     def exec(self, initial_state: State) -> None:
         pass
 
+    def solve(
+        self, initial_state: State, profile: str | None = None, trace_memory: bool = False
+    ) -> tuple:
+        # run exec and return (path, stats). profile: file where the cProfile stats of the run are
+        # dumped, trace_memory: trace the Python allocations so that the stats report their peak
+        profiler = cProfile.Profile() if profile is not None else None
+        if trace_memory:
+            tracemalloc.start()
+        try:
+            if profiler is not None:
+                profiler.enable()
+            path = self.exec(initial_state)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                profiler.dump_stats(profile)
+            if trace_memory:
+                tracemalloc.stop()
+
+        return path, self.stats
+
+    @property
+    def expanded(self) -> int:
+        return self.stats.expanded if self.stats is not None else 0
+
+    def start_stats(self) -> SearchStats:
+        self.stats = SearchStats(interval=self.interval, status=self.status)
+        self.stats.start()
+        return self.stats
+
 
 class AStar(Algorithm):
-    def __init__(self, heuristic: Heuristic, status: bool = False):
+    ENGINES = ("heap", "list")
+
+    def __init__(
+        self,
+        heuristic: Heuristic,
+        status: bool = False,
+        engine: str = "heap",
+        interval: float | None = 1.0,
+    ):
+        if engine not in AStar.ENGINES:
+            raise RuntimeError(f"unknown A* engine '{engine}'")
         self.heuristic = heuristic
         self.status = status
+        self.engine = engine
+        self.interval = interval
 
-    # https://www.geeksforgeeks.org/a-search-algorithm/
     def exec(self, initial_state: State) -> list | None:
+        if self.engine == "heap":
+            return self.__exec_heap(initial_state)
+        return self.__exec_list(initial_state)
+
+    # https://www.geeksforgeeks.org/a-search-algorithm/
+    def __exec_list(self, initial_state: State) -> list | None:
+        stats = self.start_stats()
         open_list = []
         closed_list = []
 
@@ -47,39 +107,280 @@ class AStar(Algorithm):
             open_list.sort(key=lambda elem: elem.f)
             q = open_list.pop(0)
 
-            if self.status:
-                print(
-                    f"open list: {len(open_list)} - closed list: {len(closed_list)} - state.H: {q.h} - state.G: {q.g} - state.F: {q.f}",
-                    end="\r",
-                )
-
             if q.is_game_over():
-                if self.status:
-                    print("")
+                stats.stop()
                 return reconstruct_path(q)
 
+            stats.expand(len(open_list))
             neighbors = q.neighbors()
+            stats.generated += len(neighbors)
 
             for state in neighbors:
                 state.g = q.g + 1
-                state.h = self.heuristic.H(state)
+                start = time.perf_counter()
+                state.h = self.heuristic.child_H(q, state)
+                stats.heuristic_time += time.perf_counter() - start
                 state.f = state.g + state.h
 
                 if state in open_list:
                     node = get_elem_from_list(open_list, state)
                     if node.f < state.f:
+                        stats.duplicates += 1
                         continue
 
                 if state in closed_list:
                     node = get_elem_from_list(closed_list, state)
                     if node.f < state.f:
+                        stats.duplicates += 1
                         continue
+                    stats.reopened += 1
 
                 open_list.append(state)
 
             closed_list.append(q)
 
-        if self.status:
-            print("")
+        stats.stop()
+        return None
+
+    # open set: binary heap ordered by (f, h, insertion order), stale entries are
+    # skipped when popped (lazy deletion) instead of being searched and removed
+    # best_g: best known g for every generated board
+    # closed set: hash set of expanded boards
+    def __exec_heap(self, initial_state: State) -> list | None:
+        stats = self.start_stats()
+        tie = count()
+        best_g = {}
+        closed = set()
+
+        initial_state.h = self.heuristic.H(initial_state)
+        initial_state.g = 0
+        initial_state.f = initial_state.g + initial_state.h
+
+        open_heap = [(initial_state.f, initial_state.h, next(tie), initial_state)]
+        best_g[initial_state.repr] = 0
+
+        while len(open_heap) != 0:
+            _, _, _, q = heapq.heappop(open_heap)
+
+            # stale entry: the board was expanded or reached again with a lower g
+            if q.repr in closed or q.g > best_g[q.repr]:
+                continue
+
+            if q.is_game_over():
+                stats.stop()
+                return reconstruct_path(q)
+
+            closed.add(q.repr)
+            stats.expand(len(open_heap))
+
+            children = []
+            neighbors = q.neighbors()
+            stats.generated += len(neighbors)
+            for state in neighbors:
+                g = q.g + 1
+                if g >= best_g.get(state.repr, g + 1):
+                    stats.duplicates += 1
+                    continue
+
+                # a cheaper path to an expanded board reopens it
+                if state.repr in closed:
+                    closed.discard(state.repr)
+                    stats.reopened += 1
+                best_g[state.repr] = g
+                state.g = g
+                children.append(state)
+
+            # all the children of the expansion are scored together
+            start = time.perf_counter()
+            hs = self.heuristic.children_H(q, children)
+            stats.heuristic_time += time.perf_counter() - start
+            for state, h in zip(children, hs):
+                state.h = h
+                state.f = state.g + state.h
+                heapq.heappush(open_heap, (state.f, state.h, next(tie), state))
+
+        stats.stop()
+        return None
+
+
+class IDAStar(Algorithm):
+    # iterative deepening A*: depth-first searches bounded by f, the bound grows to the smallest f
+    # that exceeded it. The search moves the blank of a single board and undoes the move on
+    # backtrack, only the blank positions of the current path are stored
+    FOUND = -1
 
+    def __init__(self, heuristic: Heuristic, status: bool = False, interval: float | None = 1.0):
+        self.heuristic = heuristic
+        self.status = status
+        self.interval = interval
+
+    def exec(self, initial_state: State) -> list | None:
+        stats = self.start_stats()
+        state = State.from_repr(initial_state.repr.copy())
+        self.blanks = [state.repr.blank]
+
+        h = self.heuristic.H(state)
+        bound = h
+        while True:
+            t = self.__search(state, 0, h, bound)
+            if t == IDAStar.FOUND:
+                stats.stop()
+                return self.__reconstruct_path(initial_state)
+            if t == math.inf:
+                stats.stop()
+                return None
+            bound = t
+
+    def __search(self, state: State, g: int, h: int, bound: int) -> int | float:
+        f = g + h
+        if f > bound:
+            return f
+        if state.is_game_over():
+            return IDAStar.FOUND
+
+        stats = self.stats
+        stats.expand(len(self.blanks))
+        repr = state.repr
+        blank = repr.blank
+        # never undo the last move: the blank does not go back to its previous position
+        previous = self.blanks[-2] if len(self.blanks) > 1 else -1
+        minimum = math.inf
+
+        for target in repr.puzzle.neighbors[blank]:
+            if target == previous:
+                continue
+
+            stats.generated += 1
+            start = time.perf_counter()
+            if self.heuristic.incremental:
+                child_h = self.heuristic.delta(h, repr.tile_at(target), target, blank)
+                repr.move_blank(target)
+            else:
+                repr.move_blank(target)
+                child_h = self.heuristic.H(state)
+            stats.heuristic_time += time.perf_counter() - start
+
+            self.blanks.append(target)
+            t = self.__search(state, g + 1, child_h, bound)
+            if t == IDAStar.FOUND:
+                return t
+            self.blanks.pop()
+            repr.move_blank(blank)
+
+            minimum = min(minimum, t)
+
+        return minimum
+
+    def __reconstruct_path(self, initial_state: State) -> list:
+        # replay the blank positions of the solution from the initial board
+        state = State.from_repr(initial_state.repr.copy())
+        state.h = self.heuristic.H(state)
+        state.f = state.h
+        for target in self.blanks[1:]:
+            repr = state.repr.copy()
+            repr.move_blank(target)
+            child = State.from_repr(repr, step=state.step + 1)
+            child.parent = state
+            child.g = state.g + 1
+            child.h = self.heuristic.H(child)
+            child.f = child.g + child.h
+            state = child
+
+        return reconstruct_path(state)
+
+
+class Bidirectional(Algorithm):
+    # bidirectional breadth-first search: one search runs forward from the initial board, the other
+    # backward from the goal (moves are reversible), the smaller frontier is expanded one whole layer
+    # at a time until the two searches meet. The heuristic is only used to annotate the solution
+    def __init__(
+        self, heuristic: Heuristic | None = None, status: bool = False, interval: float | None = 1.0
+    ):
+        self.heuristic = heuristic
+        self.status = status
+        self.interval = interval
+
+    def exec(self, initial_state: State) -> list | None:
+        stats = self.start_stats()
+        puzzle = initial_state.repr.puzzle
+        start = initial_state.repr
+        goal = puzzle.goal
+
+        # visited[tiles] = (parent tiles, blank, depth) for each direction
+        forward = {start.tiles: (None, start.blank, 0)}
+        backward = {goal.tiles: (None, goal.blank, 0)}
+        forward_frontier = [(start.tiles, start.blank)]
+        backward_frontier = [(goal.tiles, goal.blank)]
+
+        if start == goal:
+            stats.stop()
+            return self.__reconstruct_path(initial_state, forward, backward, start.tiles)
+
+        while len(forward_frontier) != 0 and len(backward_frontier) != 0:
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meet = self.__expand_layer(puzzle, forward_frontier, forward, backward)
+            else:
+                backward_frontier, meet = self.__expand_layer(puzzle, backward_frontier, backward, forward)
+
+            if meet is not None:
+                stats.stop()
+                return self.__reconstruct_path(initial_state, forward, backward, meet)
+
+        stats.stop()
         return None
+
+    def __expand_layer(self, puzzle, frontier: list, visited: dict, other: dict) -> tuple:
+        # expand a whole layer, returns (next layer, best meeting board or None)
+        bits = puzzle.bits
+        mask = puzzle.mask
+        layer = []
+        meet = None
+        best = math.inf
+
+        stats = self.stats
+        for tiles, blank in frontier:
+            stats.expand(len(frontier) + len(layer))
+            g = visited[tiles][2] + 1
+            for target in puzzle.neighbors[blank]:
+                stats.generated += 1
+                tile = (tiles >> (target * bits)) & mask
+                child = tiles ^ (tile << (target * bits)) ^ (tile << (blank * bits))
+                if child in visited:
+                    stats.duplicates += 1
+                    continue
+                visited[child] = (tiles, target, g)
+                layer.append((child, target))
+                if child in other and g + other[child][2] < best:
+                    best = g + other[child][2]
+                    meet = child
+
+        return layer, meet
+
+    def __reconstruct_path(self, initial_state: State, forward: dict, backward: dict, meet: int) -> list:
+        puzzle = initial_state.repr.puzzle
+        boards = []
+        tiles = meet
+        while tiles is not None:
+            boards.append((tiles, forward[tiles][1]))
+            tiles = forward[tiles][0]
+        boards.reverse()
+        tiles = backward[meet][0]
+        while tiles is not None:
+            boards.append((tiles, backward[tiles][1]))
+            tiles = backward[tiles][0]
+
+        return build_path(puzzle, boards, self.heuristic)
+
+
+def build_path(puzzle, boards: list, heuristic: Heuristic | None = None) -> list:
+    # parent-linked states of a solution given as a list of (tiles, blank) from the initial board to the goal
+    parent = None
+    for step, (tiles, blank) in enumerate(boards):
+        state = State.from_repr(Repr.packed(puzzle, tiles, blank), step=step)
+        state.parent = parent
+        state.g = step
+        state.h = heuristic.H(state) if heuristic is not None else 0
+        state.f = state.g + state.h
+        parent = state
+
+    return reconstruct_path(parent)
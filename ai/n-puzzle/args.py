@@ -1,4 +1,5 @@
 import argparse
+import os
 
 
 class Args:
@@ -16,4 +17,178 @@ class Args:
             default=8,
         )
 
-        return self.parser.parse_args()
+        self.parser.add_argument(
+            "--seed",
+            help="set seed of the random instance to solve. Default value: unseeded instance",
+            dest="instance_seed",
+            type=int,
+            default=None,
+        )
+
+        self.parser.add_argument(
+            "-a",
+            "--algorithm",
+            help="set search algorithm: astar, idastar, bidirectional (bidirectional breadth-first search) or hda (hash distributed A*). Default value: astar",
+            choices=["astar", "idastar", "bidirectional", "hda"],
+            default="astar",
+        )
+
+        self.parser.add_argument(
+            "-w",
+            "--workers",
+            help="set number of worker processes of the hda algorithm. Default value: number of CPUs",
+            type=int,
+            default=os.cpu_count(),
+        )
+
+        self.parser.add_argument(
+            "-e",
+            "--engine",
+            help="set A* engine: heap (binary heap open set, hashed closed set) or list (sorted open list). Default value: heap",
+            choices=["heap", "list"],
+            default="heap",
+        )
+
+        self.parser.add_argument(
+            "-H",
+            "--heuristic",
+            help="set heuristic: misplaced-tiles, manhattan, linear-conflict or pdb (requires --pdb-file). Default value: misplaced-tiles",
+            choices=["misplaced-tiles", "manhattan", "linear-conflict", "pdb"],
+            default="misplaced-tiles",
+        )
+
+        self.parser.add_argument(
+            "--pdb-file",
+            help="set pattern database file used by the pdb heuristic, see the build-pdb command",
+            type=str,
+            default=None,
+        )
+
+        self.parser.add_argument(
+            "--stats-interval",
+            help="set interval in seconds between two samples of the search stats. Default value: 1",
+            type=float,
+            default=1.0,
+        )
+
+        self.parser.add_argument(
+            "--stats-json",
+            help="set file where the search stats and their samples are dumped as JSON",
+            type=str,
+            default=None,
+        )
+
+        self.parser.add_argument(
+            "--profile",
+            help="set file where the cProfile stats of the search are dumped (read them with python -m pstats)",
+            type=str,
+            default=None,
+        )
+
+        self.parser.add_argument(
+            "--trace-memory",
+            help="trace the Python allocations of the search with tracemalloc, the peak is reported in the stats",
+            action="store_true",
+        )
+
+        commands = self.parser.add_subparsers(dest="command")
+
+        build_pdb = commands.add_parser(
+            "build-pdb",
+            help="build a disjoint additive pattern database file for the pdb heuristic",
+        )
+        build_pdb.add_argument(
+            "-n",
+            "--n-tiles",
+            help="set number of tiles. Default value: 15",
+            type=int,
+            default=15,
+        )
+        build_pdb.add_argument(
+            "-o",
+            "--output",
+            help="set output file. Default value: pdb-<n tiles>.bin",
+            type=str,
+            default=None,
+        )
+        build_pdb.add_argument(
+            "-g",
+            "--group",
+            help="add a group of tiles, comma separated (repeat the option for every group). Default value: predefined groups for 8, 15 and 24 tiles",
+            type=Args.tiles_type,
+            action="append",
+            default=None,
+        )
+        build_pdb.add_argument(
+            "--check",
+            help="check that the built values are admissible",
+            action="store_true",
+        )
+
+        batch = commands.add_parser(
+            "batch",
+            help="solve many instances across a pool of processes, the solver is set by the global options (the hda algorithm is not supported)",
+        )
+        batch.add_argument(
+            "-n",
+            "--n-tiles",
+            help="set number of tiles of the generated instances. Default value: 8",
+            type=int,
+            default=8,
+        )
+        batch.add_argument(
+            "-i",
+            "--instances",
+            help="set file of the instances to solve, one board per line (tiles row by row, 0 is the blank). Default value: generated instances",
+            type=str,
+            default=None,
+        )
+        batch.add_argument(
+            "--blank-first",
+            help="read the instances file as boards of a puzzle whose goal has the blank first (0 1 2 ... n), like the Korf's 100 instances",
+            action="store_true",
+        )
+        batch.add_argument(
+            "-c",
+            "--count",
+            help="set number of generated instances. Default value: 100",
+            type=int,
+            default=100,
+        )
+        batch.add_argument(
+            "-s",
+            "--seed",
+            help="set seed of the generated instances. Default value: 0",
+            type=int,
+            default=0,
+        )
+        batch.add_argument(
+            "-t",
+            "--timeout",
+            help="set timeout in seconds of every instance. Default value: no timeout",
+            type=float,
+            default=None,
+        )
+        batch.add_argument(
+            "-o",
+            "--output",
+            help="set JSONL output file, an existing file is resumed. Default value: results.jsonl",
+            type=str,
+            default="results.jsonl",
+        )
+
+        args = self.parser.parse_args()
+        if args.command != "build-pdb" and args.heuristic == "pdb" and args.pdb_file is None:
+            self.parser.error("the pdb heuristic requires --pdb-file")
+        if args.command == "batch" and args.algorithm == "hda":
+            self.parser.error("the hda algorithm cannot run inside the batch worker processes")
+        return args
+
+    @staticmethod
+    def tiles_type(x):
+        try:
+            tiles = tuple(int(tile) for tile in x.split(","))
+        except:
+            raise argparse.ArgumentTypeError(f"'{x}' is not a comma separated list of tiles")
+
+        return tiles
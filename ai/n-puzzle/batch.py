@@ -0,0 +1,87 @@
+import json
+import multiprocessing as mp
+import os
+import signal
+import time
+from algorithms import Algorithm
+from instances import parse_board
+from state import State
+
+# solver of the worker process, set once by init_worker
+algorithm = None
+timeout = None
+
+
+def init_worker(worker_algorithm: Algorithm, worker_timeout: float | None) -> None:
+    global algorithm, timeout
+    algorithm = worker_algorithm
+    timeout = worker_timeout
+    signal.signal(signal.SIGALRM, on_timeout)
+
+
+def on_timeout(signum, frame) -> None:
+    raise TimeoutError()
+
+
+def solve(task: tuple) -> dict:
+    index, board = task
+    state = State.from_repr(parse_board(board))
+
+    start = time.perf_counter()
+    if timeout is not None:
+        # a pathological board is interrupted instead of blocking its worker
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        path = algorithm.exec(state)
+        status = "solved" if path is not None else "unsolved"
+    except TimeoutError:
+        path = None
+        status = "timeout"
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "id": index,
+        "board": board,
+        "status": status,
+        "length": len(path) - 1 if path is not None else None,
+        "expanded": algorithm.expanded,
+        "time": round(elapsed, 6),
+    }
+
+
+def completed(output: str) -> set:
+    # ids already in the output file, a line cut by an interrupted run is dropped
+    if not os.path.exists(output):
+        return set()
+
+    with open(output, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end != len(data):
+            f.truncate(end)
+
+    ids = set()
+    for line in data[:end].decode().splitlines():
+        if line.strip() != "":
+            ids.add(json.loads(line)["id"])
+    return ids
+
+
+def run(algorithm: Algorithm, boards: list, output: str, workers: int, timeout: float | None) -> None:
+    # solve the boards across a pool of processes, appending one JSON line per board to output as
+    # soon as it is solved. Boards already in output are skipped, so an interrupted run can be resumed
+    done = completed(output)
+    tasks = [(index, board) for index, board in enumerate(boards) if index not in done]
+    print(f"{len(boards)} instances - {len(done)} already solved - {len(tasks)} to solve")
+
+    start = time.perf_counter()
+    with mp.Pool(workers, initializer=init_worker, initargs=(algorithm, timeout)) as pool, open(output, "a") as f:
+        for i, result in enumerate(pool.imap_unordered(solve, tasks), start=1):
+            f.write(json.dumps(result) + "\n")
+            f.flush()
+            elapsed = time.perf_counter() - start
+            print(f"solved: {i}/{len(tasks)} - {i / elapsed:.2f} instances/s", end="\r")
+
+    print("")
@@ -0,0 +1,260 @@
+import argparse
+import json
+import multiprocessing as mp
+import os
+import resource
+import signal
+import sys
+import tempfile
+import time
+from state import State
+from repr import get_puzzle
+from heuristics import HEURISTICS, MisplacedTiles, LinearConflict
+from algorithms import AStar, IDAStar, Bidirectional
+from hda import HDAStar
+from instances import canned, random_walk
+import pattern_database
+
+# (instance set, number of instances of the set, algorithm, heuristic) of every case of the suite
+SUITE = (
+    ("8-random-100", 20, "astar", "misplaced-tiles"),
+    ("8-random-100", 100, "astar", "manhattan"),
+    ("8-random-100", 100, "astar", "linear-conflict"),
+    ("8-random-100", 100, "astar", "pdb"),
+    ("8-random-100", 100, "idastar", "manhattan"),
+    ("8-random-100", 100, "idastar", "linear-conflict"),
+    ("8-random-100", 100, "bidirectional", "misplaced-tiles"),
+    ("15-walk30-100", 100, "astar", "manhattan"),
+    ("15-walk30-100", 100, "astar", "linear-conflict"),
+    ("15-walk30-100", 100, "idastar", "manhattan"),
+    ("15-walk30-100", 100, "idastar", "linear-conflict"),
+)
+
+ALGORITHMS = {
+    "astar": AStar,
+    "idastar": IDAStar,
+    "bidirectional": Bidirectional,
+}
+
+# default file of the stored baseline
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "baseline.json")
+
+
+def on_timeout(signum, frame) -> None:
+    raise TimeoutError()
+
+
+def run_case(task: tuple) -> dict:
+    # runs in a fresh worker process, so that the peak RSS is the one of the case alone
+    instance_set, count, algorithm, heuristic, pdb_files, timeout = task
+    states = [State.from_repr(repr) for repr in canned(instance_set)[:count]]
+    n_tiles = states[0].repr.puzzle.n_tiles
+    if heuristic == "pdb":
+        heuristic_object = HEURISTICS[heuristic](template=states[0], path=pdb_files[n_tiles])
+    else:
+        heuristic_object = HEURISTICS[heuristic](template=states[0])
+    solver = ALGORITHMS[algorithm](heuristic=heuristic_object, interval=None)
+
+    signal.signal(signal.SIGALRM, on_timeout)
+    expanded = 0
+    elapsed = 0.0
+    lengths = []
+    for state in states:
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+        start = time.perf_counter()
+        try:
+            path = solver.exec(state)
+            lengths.append(len(path) - 1 if path is not None else None)
+        except TimeoutError:
+            lengths.append(None)
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        elapsed += time.perf_counter() - start
+        expanded += solver.expanded
+
+    return {
+        "instances": len(states),
+        "solved": sum(length is not None for length in lengths),
+        "lengths": lengths,
+        "expanded": expanded,
+        "time": round(elapsed, 6),
+        "nodes_per_second": round(expanded / elapsed, 1) if elapsed > 0 else 0.0,
+        "peak_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    }
+
+
+def case_name(instance_set: str, algorithm: str, heuristic: str) -> str:
+    return f"{instance_set}/{algorithm}/{heuristic}"
+
+
+def build_pdbs(suite: tuple, directory: str) -> dict:
+    # pattern databases of the board sizes of the pdb cases, built once before the cases run
+    pdb_files = {}
+    for instance_set, _, _, heuristic in suite:
+        n_tiles = canned(instance_set)[0].puzzle.n_tiles
+        if heuristic != "pdb" or n_tiles in pdb_files:
+            continue
+        puzzle = get_puzzle(n_tiles)
+        groups = pattern_database.DEFAULT_GROUPS[n_tiles]
+        pdb_files[n_tiles] = os.path.join(directory, f"pdb-{n_tiles}.bin")
+        pattern_database.save(pdb_files[n_tiles], puzzle, groups, pattern_database.build(puzzle, groups))
+    return pdb_files
+
+
+def run_suite(suite: tuple, timeout: float) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        pdb_files = build_pdbs(suite, directory)
+        tasks = [(*case, pdb_files, timeout) for case in suite]
+        # one process per case, the cases run one at a time so that they do not disturb each other
+        with mp.Pool(1, maxtasksperchild=1) as pool:
+            for (instance_set, _, algorithm, heuristic), result in zip(suite, pool.imap(run_case, tasks)):
+                name = case_name(instance_set, algorithm, heuristic)
+                results[name] = result
+                print(
+                    f"  {name:<44} solved: {result['solved']}/{result['instances']} - {result['expanded']:>9} expansions in {result['time']:>7.2f}s - {result['nodes_per_second']:>9.0f} nodes/s - peak RSS: {result['peak_rss'] / 2**20:.0f} MiB"
+                )
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    # returns the list of the regressions: throughput below (1 - threshold) times the baseline,
+    # instances that are not solved anymore or solution lengths that changed (the solvers are optimal)
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        reference = baseline[name]
+        ratio = result["nodes_per_second"] / reference["nodes_per_second"] if reference["nodes_per_second"] > 0 else 1.0
+        print(f"  {name:<44} {ratio:>6.2f}x the baseline throughput")
+        if ratio < 1 - threshold:
+            regressions.append(f"{name}: {result['nodes_per_second']:.0f} nodes/s, baseline {reference['nodes_per_second']:.0f} nodes/s")
+        if result["solved"] < reference["solved"]:
+            regressions.append(f"{name}: {result['solved']} instances solved, baseline {reference['solved']}")
+        for index, (length, reference_length) in enumerate(zip(result["lengths"], reference["lengths"])):
+            if length is not None and reference_length is not None and length != reference_length:
+                regressions.append(f"{name}: instance {index} solved in {length} moves, baseline {reference_length}")
+    return regressions
+
+
+def bench_engines(n_tiles: int, moves: int, instances: int, seed: int) -> None:
+    states = [State.from_repr(repr) for repr in random_walk(n_tiles, moves, instances, seed)]
+
+    print(f"{n_tiles}-puzzle, {instances} instances, {moves} random moves from goal")
+    for engine in AStar.ENGINES:
+        heuristic = MisplacedTiles(template=states[0])
+        algorithm = AStar(heuristic=heuristic, engine=engine)
+        expanded = 0
+        lengths = []
+        start = time.perf_counter()
+        for state in states:
+            path = algorithm.exec(state)
+            expanded += algorithm.expanded
+            lengths.append(len(path) - 1)
+        elapsed = time.perf_counter() - start
+        print(
+            f"  {engine:>4}: {expanded} expansions in {elapsed:.2f}s - {expanded / elapsed:.0f} expansions/s - path lengths: {lengths}"
+        )
+
+
+def bench_parallel(n_tiles: int, moves: int, instances: int, seed: int) -> None:
+    states = [State.from_repr(repr) for repr in random_walk(n_tiles, moves, instances, seed)]
+    heuristic = LinearConflict(template=states[0])
+
+    print(f"{n_tiles}-puzzle, {instances} instances, {moves} random moves from goal")
+    algorithms = [("A*", AStar(heuristic=heuristic))]
+    algorithms += [(f"HDA* {w} workers", HDAStar(heuristic=heuristic, workers=w)) for w in (1, 2, 4, 8)]
+    baseline = None
+    for name, algorithm in algorithms:
+        lengths = []
+        start = time.perf_counter()
+        for state in states:
+            lengths.append(len(algorithm.exec(state)) - 1)
+        elapsed = time.perf_counter() - start
+        baseline = elapsed if baseline is None else baseline
+        print(f"  {name:>16}: {elapsed:.2f}s - speedup over A*: {baseline / elapsed:.2f} - path lengths: {lengths}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark every algorithm and heuristic on fixed seeded instances and compare with a stored baseline"
+    )
+    parser.add_argument(
+        "--baseline",
+        help=f"set baseline file. Default value: {os.path.relpath(BASELINE)}",
+        type=str,
+        default=BASELINE,
+    )
+    parser.add_argument(
+        "--save-baseline",
+        help="store the results in the baseline file instead of comparing with it",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--threshold",
+        help="set largest accepted throughput loss compared with the baseline (0.2 = 20%%). Default value: 0.2",
+        type=float,
+        default=0.2,
+    )
+    parser.add_argument(
+        "--timeout",
+        help="set timeout in seconds of every instance. Default value: 60",
+        type=float,
+        default=60.0,
+    )
+    parser.add_argument(
+        "--output",
+        help="set JSON file where the results are written",
+        type=str,
+        default=None,
+    )
+    parser.add_argument(
+        "--engines",
+        help="compare the A* engines instead of running the suite",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--parallel",
+        help="compare single-core A* with HDA* on 1, 2, 4 and 8 workers instead of running the suite",
+        action="store_true",
+    )
+    parser.add_argument("--seed", help="set seed of the --engines and --parallel instances", type=int, default=0)
+    parser.add_argument("--instances", help="set number of --engines and --parallel instances", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.parallel:
+        bench_parallel(15, 40, args.instances, args.seed)
+        return
+    if args.engines:
+        bench_engines(8, 20, args.instances, args.seed)
+        bench_engines(15, 20, args.instances, args.seed)
+        return
+
+    print(f"{len(SUITE)} cases")
+    results = run_suite(SUITE, args.timeout)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline in {args.baseline}, store one with --save-baseline")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    print(f"compared with {args.baseline}")
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"regression: {regression}")
+    if len(regressions) != 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
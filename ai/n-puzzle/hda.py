@@ -0,0 +1,186 @@
+import heapq
+import math
+import multiprocessing as mp
+from itertools import count
+from algorithms import Algorithm, build_path
+from heuristics import Heuristic
+from repr import Repr, get_puzzle
+from state import State
+
+
+def owner(tiles: int, workers: int) -> int:
+    # hash partition of the state space: ints hash to themselves, so every process agrees
+    return hash(tiles) % workers
+
+
+class HDAStar(Algorithm):
+    # hash distributed A*: every worker process owns the boards that hash to it and keeps their open
+    # heap, best g and parents. The search runs in synchronous rounds: each worker inserts the boards
+    # received in the previous round and expands up to batch nodes, sending every generated board
+    # (packed bytes, g, h, packed parent) to its owner. The search stops when no message is in flight
+    # and no open node has f lower than the best solution found
+    def __init__(
+        self,
+        heuristic: Heuristic,
+        workers: int = 2,
+        batch: int = 1000,
+        status: bool = False,
+        interval: float | None = 1.0,
+    ):
+        self.heuristic = heuristic
+        self.workers = workers
+        self.batch = batch
+        self.status = status
+        self.interval = interval
+
+    def exec(self, initial_state: State) -> list | None:
+        stats = self.start_stats()
+        puzzle = initial_state.repr.puzzle
+        initial_state.h = self.heuristic.H(initial_state)
+
+        pipes = []
+        processes = []
+        for index in range(0, self.workers):
+            parent_end, child_end = mp.Pipe()
+            process = mp.Process(
+                target=worker,
+                args=(index, self.workers, self.batch, self.heuristic, puzzle.n_tiles, child_end),
+                daemon=True,
+            )
+            process.start()
+            pipes.append(parent_end)
+            processes.append(process)
+
+        try:
+            inboxes = [[] for _ in range(0, self.workers)]
+            start = initial_state.repr.to_bytes()
+            inboxes[owner(initial_state.repr.tiles, self.workers)].append((start, 0, initial_state.h, None))
+            incumbent = math.inf
+            goal = None
+
+            while True:
+                for pipe, inbox in zip(pipes, inboxes):
+                    pipe.send(("round", inbox, incumbent))
+
+                inboxes = [[] for _ in range(0, self.workers)]
+                in_flight = 0
+                min_f = math.inf
+                expanded = 0
+                frontier = 0
+                for pipe in pipes:
+                    outboxes, solution, worker_min_f, worker_stats = pipe.recv()
+                    worker_expanded, generated, duplicates, reopened, open_size = worker_stats
+                    expanded += worker_expanded
+                    frontier += open_size
+                    stats.generated += generated
+                    stats.duplicates += duplicates
+                    stats.reopened += reopened
+                    min_f = min(min_f, worker_min_f)
+                    for index, messages in enumerate(outboxes):
+                        inboxes[index].extend(messages)
+                        in_flight += len(messages)
+                    if solution is not None and solution[1] < incumbent:
+                        goal, incumbent = solution
+                stats.expand(frontier + in_flight, count=expanded)
+
+                if in_flight == 0 and min_f >= incumbent:
+                    break
+
+            stats.stop()
+
+            if goal is None:
+                return None
+
+            # walk the parents back from the goal, asking the owner of every board
+            boards = []
+            data = goal
+            while data is not None:
+                repr = Repr.from_bytes(puzzle, data)
+                boards.append((repr.tiles, repr.blank))
+                pipe = pipes[owner(repr.tiles, self.workers)]
+                pipe.send(("parent", repr.tiles))
+                data = pipe.recv()
+            boards.reverse()
+
+            return build_path(puzzle, boards, self.heuristic)
+        finally:
+            for pipe in pipes:
+                pipe.send(("stop",))
+            for process in processes:
+                process.join()
+
+
+def worker(index: int, workers: int, batch: int, heuristic: Heuristic, n_tiles: int, pipe) -> None:
+    puzzle = get_puzzle(n_tiles)
+    tie = count()
+    open_heap = []
+    best_g = {}
+    parents = {}
+    closed = set()
+
+    # (generated, duplicates, reopened) of the current round
+    counters = [0, 0, 0]
+
+    def insert(tiles: int, blank: int, g: int, h: int, parent: bytes | None) -> None:
+        if g >= best_g.get(tiles, math.inf):
+            counters[1] += 1
+            return
+        best_g[tiles] = g
+        parents[tiles] = parent
+        if tiles in closed:
+            closed.discard(tiles)
+            counters[2] += 1
+        heapq.heappush(open_heap, (g + h, h, next(tie), tiles, blank, g))
+
+    while True:
+        message = pipe.recv()
+        if message[0] == "stop":
+            return
+        if message[0] == "parent":
+            pipe.send(parents[message[1]])
+            continue
+
+        _, inbox, incumbent = message
+        for data, g, h, parent in inbox:
+            repr = Repr.from_bytes(puzzle, data)
+            insert(repr.tiles, repr.blank, g, h, parent)
+
+        outboxes = [[] for _ in range(0, workers)]
+        solution = None
+        expanded = 0
+        counters[:] = [0, 0, 0]
+        while len(open_heap) != 0 and expanded < batch:
+            f, h, _, tiles, blank, g = heapq.heappop(open_heap)
+            if tiles in closed or g > best_g[tiles]:
+                continue
+            if f >= incumbent:
+                heapq.heappush(open_heap, (f, h, next(tie), tiles, blank, g))
+                break
+
+            q = State.from_repr(Repr.packed(puzzle, tiles, blank))
+            if q.is_game_over():
+                solution = (q.repr.to_bytes(), g)
+                incumbent = g
+                continue
+
+            closed.add(tiles)
+            expanded += 1
+            q.g = g
+            q.h = h
+            children = q.neighbors()
+            counters[0] += len(children)
+            data = q.repr.to_bytes()
+            for child, child_h in zip(children, heuristic.children_H(q, children)):
+                child_owner = owner(child.repr.tiles, workers)
+                if child_owner == index:
+                    # the boards owned by this worker do not go through the coordinator
+                    insert(child.repr.tiles, child.repr.blank, g + 1, child_h, data)
+                else:
+                    outboxes[child_owner].append((child.repr.to_bytes(), g + 1, child_h, data))
+
+        # drop the stale entries on top, so the reported min f is the one of a live node
+        while len(open_heap) != 0 and (open_heap[0][3] in closed or open_heap[0][5] > best_g[open_heap[0][3]]):
+            heapq.heappop(open_heap)
+        min_f = open_heap[0][0] if len(open_heap) != 0 else math.inf
+
+        pipe.send((outboxes, solution, min_f, (expanded, *counters, len(open_heap))))
@@ -1,28 +1,205 @@
 import numpy as np
+import pattern_database
 from state import State
 
 
 class Heuristic:
+    # True when delta can compute the h of a child from the h of its parent
+    incremental = False
+
     def H(self, state: State) -> int:
         pass
 
+    def H_many(self, states: list) -> np.ndarray:
+        return np.array([self.H(state) for state in states])
+
+    def delta(self, parent_h: int, moved_tile: int, from_pos: int, to_pos: int) -> int:
+        # h of the child reached by moving moved_tile from from_pos to to_pos (the blank goes the other way)
+        pass
+
+    def child_H(self, parent: State, child: State) -> int:
+        if not self.incremental:
+            return self.H(child)
+        # the moved tile left the cell that is now the blank of the child and took the blank of the parent
+        from_pos = child.repr.blank
+        to_pos = parent.repr.blank
+        return self.delta(parent.h, parent.repr.tile_at(from_pos), from_pos, to_pos)
+
+    def children_H(self, parent: State, children: list) -> list:
+        # h of all the children of an expansion: incremental updates or one batched evaluation
+        if self.incremental:
+            return [self.child_H(parent, child) for child in children]
+        return self.H_many(children).tolist()
+
 
 class MisplacedTiles(Heuristic):
-    def __init__(self, template: State):
-        self.n_tiles = template.repr.n_tiles
-        self.shape = template.repr.shape
-        self.n = template.repr.n
-        self.__generate_goal_instance()
+    incremental = True
 
-    def __generate_goal_instance(self) -> None:
-        self.goal = np.arange(1, self.n_tiles + 1)
-        self.goal = np.append(self.goal, 0)
-        self.goal = np.reshape(self.goal, newshape=self.shape)
+    def __init__(self, template: State):
+        self.puzzle = template.repr.puzzle
+        self.n_tiles = self.puzzle.n_tiles
+        self.shape = self.puzzle.shape
+        self.n = self.puzzle.n
+        # shared goal instance of the board size
+        self.goal = self.puzzle.goal
+        # goal_line[i] = tile of the goal instance at index i
+        self.goal_line = tuple(self.goal.tile_at(i) for i in range(0, self.puzzle.cells))
 
     def H(self, state: State) -> int:
+        # a cell is misplaced when its bits differ from the goal ones
+        diff = state.repr.tiles ^ self.goal.tiles
+        bits = self.puzzle.bits
+        mask = self.puzzle.mask
         misplaced = 0
-        for i in range(0, self.n):
-            for j in range(0, self.n):
-                if state.repr.grid[i, j] != self.goal[i, j]:
-                    misplaced += 1
+        for i in range(0, self.puzzle.cells):
+            if (diff >> (i * bits)) & mask:
+                misplaced += 1
         return misplaced
+
+    def delta(self, parent_h: int, moved_tile: int, from_pos: int, to_pos: int) -> int:
+        # the blank is counted too: it moves from to_pos to from_pos
+        goal = self.goal_line
+        return (
+            parent_h
+            - (moved_tile != goal[from_pos])
+            + (moved_tile != goal[to_pos])
+            - (goal[to_pos] != 0)
+            + (goal[from_pos] != 0)
+        )
+
+
+class ManhattanDistance(Heuristic):
+    incremental = True
+
+    def __init__(self, template: State):
+        self.puzzle = template.repr.puzzle
+        self.n = self.puzzle.n
+        self.cells = np.arange(self.puzzle.cells)
+        # goal_pos[tile] = index of tile in the goal instance
+        self.goal_pos = np.argsort(np.reshape(self.puzzle.goal.grid, newshape=-1))
+        rows, cols = np.divmod(self.cells, self.n)
+        self.goal_rows = rows[self.goal_pos]
+        self.goal_cols = cols[self.goal_pos]
+        # distance[tile, i] = Manhattan distance of tile at index i from its goal index, the blank is not counted
+        self.distance = np.abs(self.goal_rows[:, None] - rows[None, :]) + np.abs(
+            self.goal_cols[:, None] - cols[None, :]
+        )
+        self.distance[0, :] = 0
+        self.distance_table = tuple(tuple(row) for row in self.distance.tolist())
+
+    def H(self, state: State) -> int:
+        repr = state.repr
+        return sum(self.distance_table[repr.tile_at(i)][i] for i in range(0, self.puzzle.cells))
+
+    def H_many(self, states: list) -> np.ndarray:
+        grids = self.puzzle.decode_many([state.repr.tiles for state in states])
+        return self.distance[grids, self.cells].sum(axis=1)
+
+    def delta(self, parent_h: int, moved_tile: int, from_pos: int, to_pos: int) -> int:
+        distance = self.distance_table[moved_tile]
+        return parent_h - distance[from_pos] + distance[to_pos]
+
+
+class LinearConflict(ManhattanDistance):
+    # Manhattan distance + 2 moves for every tile that has to leave its goal line to let the others pass.
+    # Every line is reduced to a key, conflicts[key] holds the number of tiles to remove from the line
+    incremental = False
+    MAX_N = 6
+
+    def __init__(self, template: State):
+        super().__init__(template)
+        if self.n > LinearConflict.MAX_N:
+            raise RuntimeError(f"linear conflict supports boards up to {LinearConflict.MAX_N}x{LinearConflict.MAX_N}")
+        rows, cols = np.divmod(self.cells, self.n)
+        # row_code[tile, i] = goal column + 1 of tile if its goal row is the row of index i, 0 otherwise
+        self.row_code = np.where(self.goal_rows[:, None] == rows[None, :], self.goal_cols[:, None] + 1, 0)
+        # col_code[tile, i] = goal row + 1 of tile if its goal column is the column of index i, 0 otherwise
+        self.col_code = np.where(self.goal_cols[:, None] == cols[None, :], self.goal_rows[:, None] + 1, 0)
+        self.row_code[0, :] = 0
+        self.col_code[0, :] = 0
+        # key of a line = sum(code[j] * (n + 1)^j) over the cells j of the line
+        self.powers = (self.n + 1) ** np.arange(self.n)
+        self.__compute_conflicts()
+
+    def __compute_conflicts(self) -> None:
+        base = self.n + 1
+        self.conflicts = np.zeros(base**self.n, dtype=np.int64)
+        for key in range(0, base**self.n):
+            values = []
+            k = key
+            for _ in range(0, self.n):
+                k, code = divmod(k, base)
+                if code != 0:
+                    values.append(code - 1)
+            # tiles to remove = tiles in their goal line - longest increasing subsequence of their goal positions
+            longest = [1] * len(values)
+            for i in range(0, len(values)):
+                for j in range(0, i):
+                    if values[j] < values[i]:
+                        longest[i] = max(longest[i], longest[j] + 1)
+            self.conflicts[key] = len(values) - max(longest, default=0)
+
+    def H(self, state: State) -> int:
+        return int(self.H_many([state])[0])
+
+    def H_many(self, states: list) -> np.ndarray:
+        grids = self.puzzle.decode_many([state.repr.tiles for state in states])
+        manhattan = self.distance[grids, self.cells].sum(axis=1)
+        # (k, row, position in row) and (k, column, position in column)
+        row_codes = self.row_code[grids, self.cells].reshape(-1, self.n, self.n)
+        col_codes = self.col_code[grids, self.cells].reshape(-1, self.n, self.n).transpose(0, 2, 1)
+        conflicts = self.conflicts[row_codes @ self.powers].sum(axis=1)
+        conflicts += self.conflicts[col_codes @ self.powers].sum(axis=1)
+        return manhattan + 2 * conflicts
+
+
+class PatternDatabase(Heuristic):
+    # disjoint additive pattern database: the sum over the tile groups of the moves needed
+    # by the tiles of the group, looked up in tables memory-mapped from the file built by build-pdb
+    def __init__(self, template: State, path: str):
+        self.puzzle = template.repr.puzzle
+        self.path = path
+        self.__load()
+
+    def __load(self) -> None:
+        n_tiles, self.groups, self.tables = pattern_database.load(self.path)
+        if n_tiles != self.puzzle.n_tiles:
+            raise RuntimeError(f"'{self.path}' is a pattern database for the {n_tiles}-puzzle")
+        self.weights = [self.puzzle.cells ** np.arange(len(group)) for group in self.groups]
+        self.weight_tables = [tuple(w.tolist()) for w in self.weights]
+
+    def H(self, state: State) -> int:
+        repr = state.repr
+        pos = [0] * self.puzzle.cells
+        for i in range(0, self.puzzle.cells):
+            pos[repr.tile_at(i)] = i
+        h = 0
+        for group, table, weights in zip(self.groups, self.tables, self.weight_tables):
+            h += int(table[sum(pos[tile] * w for tile, w in zip(group, weights))])
+        return h
+
+    def H_many(self, states: list) -> np.ndarray:
+        grids = self.puzzle.decode_many([state.repr.tiles for state in states])
+        # pos[k, tile] = index of tile in board k
+        pos = np.argsort(grids, axis=1)
+        h = np.zeros(len(states), dtype=np.int64)
+        for group, table, weights in zip(self.groups, self.tables, self.weights):
+            h += table[pos[:, list(group)] @ weights]
+        return h
+
+    def __getstate__(self) -> dict:
+        # worker processes map the file again instead of receiving a copy of the tables
+        return {"puzzle": self.puzzle, "path": self.path}
+
+    def __setstate__(self, state: dict) -> None:
+        self.puzzle = state["puzzle"]
+        self.path = state["path"]
+        self.__load()
+
+
+HEURISTICS = {
+    "misplaced-tiles": MisplacedTiles,
+    "manhattan": ManhattanDistance,
+    "linear-conflict": LinearConflict,
+    "pdb": PatternDatabase,
+}
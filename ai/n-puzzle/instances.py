@@ -0,0 +1,76 @@
+import numpy as np
+from repr import Repr, get_puzzle
+
+
+def parse_board(line: str, blank_first: bool = False) -> Repr:
+    # a board is the list of its tiles row by row, separated by spaces or commas, 0 is the blank.
+    # blank_first: the board comes from a set whose goal has the blank first (0 1 2 ... n, like the
+    # Korf's 100 instances), it is rotated by 180 degrees and its tiles t are renamed to n + 1 - t,
+    # which maps that goal on 1 2 ... n 0 and keeps the solution length
+    try:
+        tiles = [int(tile) for tile in line.replace(",", " ").split()]
+    except ValueError:
+        raise RuntimeError(f"'{line.strip()}' is not a list of tiles")
+    if sorted(tiles) != list(range(0, len(tiles))):
+        raise RuntimeError(f"'{line.strip()}' is not a permutation of the tiles 0..{len(tiles) - 1}")
+    if blank_first:
+        tiles = [len(tiles) - tile if tile != 0 else 0 for tile in reversed(tiles)]
+
+    repr = Repr.from_grid(np.array(tiles))
+    if not repr.is_solvable():
+        raise RuntimeError(f"'{line.strip()}' is not solvable")
+    return repr
+
+
+def format_board(repr: Repr) -> str:
+    return " ".join(str(repr.tile_at(i)) for i in range(0, repr.puzzle.cells))
+
+
+def read_instances(path: str, blank_first: bool = False) -> list:
+    # one board per line, empty lines and lines starting with # are skipped
+    instances = []
+    with open(path) as f:
+        for line in f:
+            if line.strip() == "" or line.lstrip().startswith("#"):
+                continue
+            instances.append(parse_board(line, blank_first))
+    return instances
+
+
+def generate(n_tiles: int, count: int, seed: int) -> list:
+    # count random solvable boards, the same seed always gives the same boards
+    rng = np.random.default_rng(seed)
+    return [Repr(n_tiles, rng) for _ in range(0, count)]
+
+
+def random_walk(n_tiles: int, moves: int, count: int, seed: int) -> list:
+    # count boards obtained by moving the blank of the goal instance moves times at random, without
+    # ever undoing the previous move: the difficulty grows with moves (the solution is at most moves long)
+    rng = np.random.default_rng(seed)
+    goal = get_puzzle(n_tiles).goal
+    boards = []
+    for _ in range(0, count):
+        repr = goal.copy()
+        previous = -1
+        for _ in range(0, moves):
+            targets = [target for target in repr.puzzle.neighbors[repr.blank] if target != previous]
+            previous = repr.blank
+            repr.move_blank(targets[rng.integers(len(targets))])
+        boards.append(repr)
+    return boards
+
+
+# canned instance sets, always generated with the same seeds: uniformly random solvable boards
+# and boards k random moves away from the goal
+SETS = {
+    "8-random-100": lambda: generate(8, 100, seed=8),
+    "15-walk30-100": lambda: random_walk(15, 30, 100, seed=15),
+    "15-walk60-100": lambda: random_walk(15, 60, 100, seed=15),
+    "24-walk40-100": lambda: random_walk(24, 40, 100, seed=24),
+}
+
+
+def canned(name: str) -> list:
+    if name not in SETS:
+        raise RuntimeError(f"unknown instance set '{name}', available sets: {', '.join(SETS)}")
+    return SETS[name]()
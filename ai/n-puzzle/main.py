@@ -1,27 +1,163 @@
 from state import State
-from heuristics import MisplacedTiles
-from algorithms import AStar
+from repr import get_puzzle
+from heuristics import HEURISTICS
+from algorithms import Algorithm, AStar, IDAStar, Bidirectional
+from hda import HDAStar
 from args import Args
+from instances import format_board, generate, read_instances
+import batch
+import pattern_database
+import numpy as np
+import time
 
 
-def run(n_tiles: int) -> None:
-    initial_state = State(n_tiles=n_tiles)
-    heuristic = MisplacedTiles(template=initial_state)
-    algorithm = AStar(heuristic=heuristic, status=True)
+def create_algorithm(
+    template: State,
+    algorithm: str,
+    engine: str,
+    heuristic: str,
+    pdb_file: str | None,
+    workers: int,
+    status: bool,
+    interval: float | None = 1.0,
+) -> Algorithm:
+    if heuristic == "pdb":
+        heuristic = HEURISTICS[heuristic](template=template, path=pdb_file)
+    else:
+        heuristic = HEURISTICS[heuristic](template=template)
+
+    if algorithm == "idastar":
+        return IDAStar(heuristic=heuristic, status=status, interval=interval)
+    elif algorithm == "bidirectional":
+        return Bidirectional(heuristic=heuristic, status=status, interval=interval)
+    elif algorithm == "hda":
+        return HDAStar(heuristic=heuristic, workers=workers, status=status, interval=interval)
+    else:
+        return AStar(heuristic=heuristic, status=status, engine=engine, interval=interval)
+
+
+def run(
+    n_tiles: int,
+    algorithm: str,
+    engine: str,
+    heuristic: str,
+    pdb_file: str | None,
+    workers: int,
+    seed: int | None,
+    stats_interval: float,
+    stats_json: str | None,
+    profile: str | None,
+    trace_memory: bool,
+) -> None:
+    rng = np.random.default_rng(seed) if seed is not None else None
+    initial_state = State(n_tiles=n_tiles, rng=rng)
+    algorithm = create_algorithm(
+        initial_state, algorithm, engine, heuristic, pdb_file, workers, status=True, interval=stats_interval
+    )
 
     print(initial_state.repr)
 
-    path = algorithm.exec(initial_state)
+    path, stats = algorithm.solve(initial_state, profile=profile, trace_memory=trace_memory)
 
     print("\nSolution:\n")
 
     for state in path:
         print(state, end="\n\n")
 
+    print("Stats:\n")
+    for key, value in stats.to_dict().items():
+        print(f"{key}: {value}")
+
+    if stats_json is not None:
+        stats.dump(stats_json)
+    if profile is not None:
+        print(f"\nprofile written to {profile}")
+
+
+def build_pdb(n_tiles: int, output: str | None, groups: list | None, check: bool) -> None:
+    puzzle = get_puzzle(n_tiles)
+    if groups is None:
+        if n_tiles not in pattern_database.DEFAULT_GROUPS:
+            raise RuntimeError(f"no default groups for {n_tiles} tiles, set them with --group")
+        groups = pattern_database.DEFAULT_GROUPS[n_tiles]
+    if output is None:
+        output = f"pdb-{n_tiles}.bin"
+
+    start = time.perf_counter()
+    tables = pattern_database.build(puzzle, tuple(groups))
+    pattern_database.save(output, puzzle, tuple(groups), tables)
+    print(f"pattern database {output} built in {time.perf_counter() - start:.2f}s")
+
+    if check:
+        _, groups, tables = pattern_database.load(output)
+        errors = pattern_database.check(puzzle, groups, tables)
+        for error in errors:
+            print(error)
+        if len(errors) != 0:
+            raise SystemExit(1)
+        print("pattern database values are admissible")
+
+
+def run_batch(
+    n_tiles: int,
+    instances: str | None,
+    blank_first: bool,
+    count: int,
+    seed: int,
+    algorithm: str,
+    engine: str,
+    heuristic: str,
+    pdb_file: str | None,
+    workers: int,
+    timeout: float | None,
+    output: str,
+) -> None:
+    if instances is not None:
+        boards = read_instances(instances, blank_first)
+    else:
+        boards = generate(n_tiles, count, seed)
+    if len(boards) == 0:
+        return
+
+    template = State.from_repr(boards[0])
+    algorithm = create_algorithm(template, algorithm, engine, heuristic, pdb_file, workers, status=False)
+    batch.run(algorithm, [format_board(board) for board in boards], output, workers, timeout)
+
 
 def main() -> None:
     cli_args = Args().parse_args()
-    run(cli_args.n_tiles)
+    if cli_args.command == "build-pdb":
+        build_pdb(cli_args.n_tiles, cli_args.output, cli_args.group, cli_args.check)
+        return
+    if cli_args.command == "batch":
+        run_batch(
+            cli_args.n_tiles,
+            cli_args.instances,
+            cli_args.blank_first,
+            cli_args.count,
+            cli_args.seed,
+            cli_args.algorithm,
+            cli_args.engine,
+            cli_args.heuristic,
+            cli_args.pdb_file,
+            cli_args.workers,
+            cli_args.timeout,
+            cli_args.output,
+        )
+        return
+    run(
+        cli_args.n_tiles,
+        cli_args.algorithm,
+        cli_args.engine,
+        cli_args.heuristic,
+        cli_args.pdb_file,
+        cli_args.workers,
+        cli_args.instance_seed,
+        cli_args.stats_interval,
+        cli_args.stats_json,
+        cli_args.profile,
+        cli_args.trace_memory,
+    )
 
 
 if __name__ == "__main__":
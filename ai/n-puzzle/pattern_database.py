@@ -0,0 +1,171 @@
+import numpy as np
+from repr import Puzzle
+
+# file layout: MAGIC, n_tiles, number of groups, then size and tiles of every group,
+# followed by one table per group with one byte per abstract state
+MAGIC = b"NPDB"
+UNKNOWN = 255
+
+# disjoint tile groups following regions of the goal instance
+DEFAULT_GROUPS = {
+    8: ((1, 2, 4, 5), (3, 6, 7, 8)),
+    15: ((1, 2, 5, 6, 9), (3, 4, 7, 8, 12), (10, 11, 13, 14, 15)),
+    24: (
+        (1, 2, 6, 7),
+        (3, 4, 8, 9),
+        (5, 10, 15, 20),
+        (11, 12, 16, 17),
+        (13, 14, 18, 19),
+        (21, 22, 23, 24),
+    ),
+}
+
+
+def goal_positions(puzzle: Puzzle) -> np.ndarray:
+    # goal_pos[tile] = index of tile in the goal instance
+    return np.argsort(np.reshape(puzzle.goal.grid, newshape=-1))
+
+
+def build_table(puzzle: Puzzle, group: tuple) -> np.ndarray:
+    # retrograde 0-1 BFS from the goal over (positions of the group tiles, blank position):
+    # moving a tile of the group costs 1, moving any other tile costs 0.
+    # The abstract state index is sum(position[i] * cells^i), with the blank as last digit
+    cells = puzzle.cells
+    k = len(group)
+    weights = cells ** np.arange(k + 1, dtype=np.int64)
+    move_table = np.array(puzzle.move_table)
+    goal_pos = goal_positions(puzzle)
+
+    dist = np.full(cells ** (k + 1), UNKNOWN, dtype=np.uint8)
+    start = int(np.dot(np.append(goal_pos[list(group)], goal_pos[0]), weights))
+    dist[start] = 0
+
+    frontier = np.array([start], dtype=np.int64)
+    depth = 0
+    while frontier.size != 0:
+        # close the level over the zero cost moves, collecting the unit cost ones
+        level = [frontier]
+        new = frontier
+        while new.size != 0:
+            zero, one = expand(new, weights, move_table, k, cells)
+            zero = np.unique(zero[dist[zero] == UNKNOWN])
+            dist[zero] = depth
+            level.append(zero)
+            new = zero
+
+        one = np.concatenate([expand(states, weights, move_table, k, cells)[1] for states in level])
+        one = np.unique(one[dist[one] == UNKNOWN])
+        depth += 1
+        if depth >= UNKNOWN:
+            raise RuntimeError("pattern database values do not fit in a byte")
+        dist[one] = depth
+        frontier = one
+
+    # the table does not track the blank: keep the best blank position
+    return dist.reshape(cells, cells**k).min(axis=0)
+
+
+def expand(states: np.ndarray, weights: np.ndarray, move_table: np.ndarray, k: int, cells: int) -> tuple:
+    # successors of the abstract states, split by cost: (zero cost moves, unit cost moves)
+    digits = (states[:, None] // weights) % cells
+    pattern = digits[:, :k]
+    blank = digits[:, k]
+    zero = []
+    one = []
+    for direction in range(0, move_table.shape[1]):
+        target = move_table[blank, direction]
+        valid = target != -1
+        hit = pattern == target[:, None]
+        moved = hit.any(axis=1)
+        # the blank goes to target, a tile of the group in target goes to the old blank
+        successors = states + (target - blank) * weights[k]
+        successors += (hit * ((blank - target)[:, None] * weights[:k])).sum(axis=1)
+        zero.append(successors[valid & ~moved])
+        one.append(successors[valid & moved])
+    return np.concatenate(zero), np.concatenate(one)
+
+
+def build(puzzle: Puzzle, groups: tuple) -> list:
+    tiles = sorted(tile for group in groups for tile in group)
+    if len(tiles) != len(set(tiles)) or not set(tiles) <= set(range(1, puzzle.n_tiles + 1)):
+        raise RuntimeError("pattern database groups must be disjoint sets of tiles")
+    return [build_table(puzzle, group) for group in groups]
+
+
+def save(path: str, puzzle: Puzzle, groups: tuple, tables: list) -> None:
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(bytes([puzzle.n_tiles, len(groups)]))
+        for group in groups:
+            f.write(bytes([len(group), *group]))
+        for table in tables:
+            f.write(np.ascontiguousarray(table, dtype=np.uint8).tobytes())
+
+
+def load(path: str) -> tuple:
+    # returns (n_tiles, groups, tables), the tables are read-only views of one memory map of the file
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise RuntimeError(f"'{path}' is not a pattern database")
+        n_tiles, n_groups = f.read(2)
+        groups = []
+        for _ in range(0, n_groups):
+            size = f.read(1)[0]
+            groups.append(tuple(f.read(size)))
+        offset = f.tell()
+
+    cells = n_tiles + 1
+    data = np.memmap(path, dtype=np.uint8, mode="r", offset=offset)
+    tables = []
+    start = 0
+    for group in groups:
+        size = cells ** len(group)
+        tables.append(data[start : start + size])
+        start += size
+    if start != data.size:
+        raise RuntimeError(f"'{path}' is truncated or corrupted")
+    return n_tiles, tuple(groups), tables
+
+
+def check(puzzle: Puzzle, groups: tuple, tables: list, samples: int = 1000, seed: int = 0) -> list:
+    # admissibility checks, returns the list of the failed ones:
+    # - the moves of the group tiles are at least their Manhattan distance, so every
+    #   reachable entry must be >= the Manhattan distance of the group
+    # - boards k random moves away from the goal are at most k moves away, so the additive h must be <= k
+    errors = []
+    cells = puzzle.cells
+    goal_pos = goal_positions(puzzle)
+    rows, cols = np.divmod(np.arange(cells), puzzle.n)
+
+    for group, table in zip(groups, tables):
+        k = len(group)
+        digits = (np.arange(cells**k, dtype=np.int64)[:, None] // cells ** np.arange(k)) % cells
+        # entries with two tiles on the same cell do not exist
+        valid = np.all(np.diff(np.sort(digits, axis=1), axis=1) != 0, axis=1)
+        targets = goal_pos[list(group)]
+        manhattan = (np.abs(rows[digits] - rows[targets]) + np.abs(cols[digits] - cols[targets])).sum(axis=1)
+        values = np.asarray(table)[valid]
+        if np.any(values == UNKNOWN):
+            errors.append(f"group {group}: {np.count_nonzero(values == UNKNOWN)} abstract states were not reached")
+        below = np.count_nonzero(values < manhattan[valid])
+        if below != 0:
+            errors.append(f"group {group}: {below} entries are below the Manhattan distance")
+
+    rng = np.random.default_rng(seed)
+    weights = [cells ** np.arange(len(group)) for group in groups]
+    for _ in range(0, samples):
+        length = int(rng.integers(1, 4 * cells))
+        line = np.append(np.arange(1, cells), 0)
+        blank = cells - 1
+        for _ in range(0, length):
+            targets = puzzle.neighbors[blank]
+            target = targets[rng.integers(len(targets))]
+            line[blank], line[target] = line[target], 0
+            blank = target
+        pos = np.argsort(line)
+        h = sum(int(table[np.dot(pos[list(group)], w)]) for group, table, w in zip(groups, tables, weights))
+        if h > length:
+            errors.append(f"h = {h} for a board {length} moves away from the goal")
+            break
+
+    return errors
@@ -1,67 +1,182 @@
 import numpy as np
 import math
+from functools import cache
+from typing import Self
 
 
-class Repr:
+class Puzzle:
+    # everything that depends only on the board size: shape, tile packing and the goal instance.
+    # One Puzzle is shared by all the boards of the same size (see get_puzzle)
     def __init__(self, n_tiles: int):
         self.n_tiles = n_tiles
         self.__compute_shape()
-        self.__generate_instance()
+        self.cells = n_tiles + 1
+        # 4 bits per tile up to the 15-puzzle, wider tiles for bigger boards
+        self.bits = max(4, n_tiles.bit_length())
+        self.mask = (1 << self.bits) - 1
+        # bytes of the packed tiles
+        self.nbytes = (self.cells * self.bits + 7) // 8
+        self.__compute_move_tables()
         self.__generate_goal_instance()
 
+    def encode(self, grid: np.ndarray) -> tuple:
+        line = np.reshape(grid, newshape=self.cells)
+        tiles = 0
+        for i, tile in enumerate(line):
+            tiles |= int(tile) << (i * self.bits)
+        blank = int(np.argwhere(line == 0)[0][0])
+        return tiles, blank
+
+    def decode(self, tiles: int) -> np.ndarray:
+        line = [(tiles >> (i * self.bits)) & self.mask for i in range(0, self.cells)]
+        return np.reshape(np.array(line), newshape=self.shape)
+
+    def decode_many(self, tiles: list) -> np.ndarray:
+        # decode k packed boards at once into a (k, cells) array of tiles
+        raw = b"".join(t.to_bytes(self.nbytes, "little") for t in tiles)
+        data = np.frombuffer(raw, dtype=np.uint8).reshape(len(tiles), self.nbytes)
+        bits = np.unpackbits(data, axis=1, bitorder="little")[:, : self.cells * self.bits]
+        bits = bits.reshape(len(tiles), self.cells, self.bits)
+        return bits @ (1 << np.arange(self.bits))
+
+    def __compute_shape(self) -> None:
+        shape = math.sqrt(self.n_tiles + 1)
+        if not shape.is_integer():
+            raise RuntimeError("Instance must be compatible with a grid (n x n)")
+        self.n = int(shape)
+        self.shape = (self.n, self.n)
+
+    def __compute_move_tables(self) -> None:
+        # move_table[blank] = index reached by the blank moving (up, down, left, right), -1 if not possible
+        move_table = []
+        for blank in range(0, self.cells):
+            x, y = divmod(blank, self.n)
+            move_table.append(
+                (
+                    blank - self.n if x - 1 >= 0 else -1,
+                    blank + self.n if x + 1 < self.n else -1,
+                    blank - 1 if y - 1 >= 0 else -1,
+                    blank + 1 if y + 1 < self.n else -1,
+                )
+            )
+        self.move_table = tuple(move_table)
+        # neighbors[blank] = legal indices the blank can move to
+        self.neighbors = tuple(
+            tuple(target for target in targets if target != -1)
+            for targets in self.move_table
+        )
+
+    def __generate_goal_instance(self) -> None:
+        goal = np.arange(1, self.n_tiles + 1)
+        goal = np.append(goal, 0)
+        self.goal = Repr.packed(self, *self.encode(goal))
+
+
+@cache
+def get_puzzle(n_tiles: int) -> Puzzle:
+    return Puzzle(n_tiles)
+
+
+UP, DOWN, LEFT, RIGHT = 0, 1, 2, 3
+
+
+class Repr:
+    # packed board: tile i is stored in bits [i * bits, (i + 1) * bits) of one int,
+    # the blank index is tracked apart so that moves are O(1)
+    __slots__ = ("puzzle", "tiles", "blank")
+
+    def __init__(self, n_tiles: int, rng: np.random.Generator | None = None):
+        self.puzzle = get_puzzle(n_tiles)
+        self.__generate_instance(rng)
+
+    @classmethod
+    def packed(cls, puzzle: Puzzle, tiles: int, blank: int) -> Self:
+        # build a board from already packed tiles, without generating an instance
+        repr = cls.__new__(cls)
+        repr.puzzle = puzzle
+        repr.tiles = tiles
+        repr.blank = blank
+        return repr
+
+    @classmethod
+    def from_grid(cls, grid: np.ndarray) -> Self:
+        puzzle = get_puzzle(np.size(grid) - 1)
+        return cls.packed(puzzle, *puzzle.encode(grid))
+
+    @classmethod
+    def from_bytes(cls, puzzle: Puzzle, data: bytes) -> Self:
+        return cls.packed(puzzle, int.from_bytes(data[:-1], "little"), data[-1])
+
+    def to_bytes(self) -> bytes:
+        # packed tiles followed by the blank index
+        return self.tiles.to_bytes(self.puzzle.nbytes, "little") + bytes([self.blank])
+
+    def copy(self) -> Self:
+        return Repr.packed(self.puzzle, self.tiles, self.blank)
+
+    @property
+    def n_tiles(self) -> int:
+        return self.puzzle.n_tiles
+
+    @property
+    def n(self) -> int:
+        return self.puzzle.n
+
+    @property
+    def shape(self) -> tuple:
+        return self.puzzle.shape
+
+    @property
+    def goal(self) -> Self:
+        return self.puzzle.goal
+
+    @property
+    def grid(self) -> np.ndarray:
+        return self.puzzle.decode(self.tiles)
+
+    def tile_at(self, index: int) -> int:
+        return (self.tiles >> (index * self.puzzle.bits)) & self.puzzle.mask
+
     def move_up(self) -> None:
-        x, y = self.__get_x_pos()
-        if x - 1 < 0:
-            raise RuntimeError("move up not possible")
-        tmp = self.grid[x - 1, y]
-        self.grid[x - 1, y] = self.grid[x, y]
-        self.grid[x, y] = tmp
+        self.__move_direction(UP, "up")
 
     def move_down(self) -> None:
-        x, y = self.__get_x_pos()
-        if x + 1 >= self.n:
-            raise RuntimeError("move down not possible")
-        tmp = self.grid[x + 1, y]
-        self.grid[x + 1, y] = self.grid[x, y]
-        self.grid[x, y] = tmp
+        self.__move_direction(DOWN, "down")
 
     def move_left(self) -> None:
-        x, y = self.__get_x_pos()
-        if y - 1 < 0:
-            raise RuntimeError("move left not possible")
-        tmp = self.grid[x, y - 1]
-        self.grid[x, y - 1] = self.grid[x, y]
-        self.grid[x, y] = tmp
+        self.__move_direction(LEFT, "left")
 
     def move_right(self) -> None:
-        x, y = self.__get_x_pos()
-        if y + 1 >= self.n:
-            raise RuntimeError("move right not possible")
-        tmp = self.grid[x, y + 1]
-        self.grid[x, y + 1] = self.grid[x, y]
-        self.grid[x, y] = tmp
+        self.__move_direction(RIGHT, "right")
+
+    def move_blank(self, target: int) -> None:
+        # the blank cell holds 0: xor the tile out of target and into the blank cell
+        bits = self.puzzle.bits
+        tile = self.tile_at(target)
+        self.tiles ^= (tile << (target * bits)) | (tile << (self.blank * bits))
+        self.blank = target
 
     def is_game_over(self) -> bool:
-        for i in range(0, self.n):
-            for j in range(0, self.n):
-                if self.grid[i, j] != self.goal[i, j]:
-                    return False
-        return True
+        return self.tiles == self.puzzle.goal.tiles
 
-    def __compute_shape(self) -> None:
-        shape = math.sqrt(self.n_tiles + 1)
-        if not shape.is_integer():
-            raise RuntimeError("Instance must be compatible with a grid (n x n)")
-        self.n = int(shape)
-        self.shape = (self.n, self.n)
+    def is_solvable(self) -> bool:
+        return self.__validate(self.grid)
 
-    def __generate_instance(self) -> None:
-        self.grid = np.arange(0, self.n_tiles + 1)
+    def __move_direction(self, direction: int, name: str) -> None:
+        target = self.puzzle.move_table[self.blank][direction]
+        if target == -1:
+            raise RuntimeError(f"move {name} not possible")
+        self.move_blank(target)
+
+    def __generate_instance(self, rng: np.random.Generator | None) -> None:
+        shuffle = np.random.shuffle if rng is None else rng.shuffle
+        grid = np.arange(0, self.n_tiles + 1)
         while True:
-            np.random.shuffle(self.grid)
-            self.grid = self.grid.reshape(self.shape)
-            if self.__validate(self.grid):
+            shuffle(grid)
+            grid = grid.reshape(self.shape)
+            if self.__validate(grid):
                 break
+        self.tiles, self.blank = self.puzzle.encode(grid)
 
     def __validate(self, grid: np.ndarray) -> bool:
         is_even_inversion_count = self.__compute_inversions(grid) % 2 == 0
@@ -94,19 +209,12 @@ class Repr:
         line = np.reshape(grid, newshape=self.n_tiles + 1)
         return np.delete(line, line == 0)
 
-    def __get_x_pos(self) -> tuple:
-        return tuple(np.argwhere(self.grid == 0)[0])
-
-    def __generate_goal_instance(self) -> None:
-        self.goal = np.arange(1, self.n_tiles + 1)
-        self.goal = np.append(self.goal, 0)
-        self.goal = np.reshape(self.goal, newshape=self.shape)
-
     def __str__(self):
         out = ""
         for i in range(0, self.n):
             for j in range(0, self.n):
-                tile = "X" if self.grid[i, j] == 0 else str(self.grid[i, j])
+                tile = self.tile_at(i * self.n + j)
+                tile = "X" if tile == 0 else str(tile)
                 if j == self.n - 1:
                     out += tile + "\n"
                 else:
@@ -115,7 +223,7 @@ class Repr:
 
     def __eq__(self, o):
         if isinstance(o, Repr):
-            return np.array_equal(self.grid, o.grid)
+            return self.tiles == o.tiles
         else:
             return False
 
@@ -123,4 +231,4 @@ class Repr:
         return not self.__eq__(o)
 
     def __hash__(self):
-        return hash(str(self.grid))
+        return hash(self.tiles)
@@ -1,68 +1,80 @@
+import numpy as np
 from repr import Repr
-from copy import deepcopy
 from typing import Self
 
 
 class State:
-    def __init__(self, n_tiles: int):
-        self.repr = Repr(n_tiles)
+    __slots__ = ("repr", "parent", "g", "h", "f", "step")
+
+    def __init__(self, n_tiles: int, rng: np.random.Generator | None = None):
+        self.repr = Repr(n_tiles, rng)
         self.parent = None
         self.g = 0
         self.h = 0
         self.f = 0
         self.step = 0
 
+    @classmethod
+    def from_repr(cls, repr: Repr, step: int = 0) -> Self:
+        # build a state around an existing board, without generating an instance
+        state = cls.__new__(cls)
+        state.repr = repr
+        state.parent = None
+        state.g = 0
+        state.h = 0
+        state.f = 0
+        state.step = step
+        return state
+
     def is_game_over(self) -> bool:
         return self.repr.is_game_over()
 
-    def neighbors(self) -> set:
-        states = [self.move_up(), self.move_down(), self.move_left(), self.move_right()]
-        states = set(filter(lambda item: item is not None, states))
-
-        for s in states:
-            s.parent = self
+    def neighbors(self) -> list:
+        states = []
+        for target in self.repr.puzzle.neighbors[self.repr.blank]:
+            repr = self.repr.copy()
+            repr.move_blank(target)
+            state = State.from_repr(repr, step=self.step + 1)
+            state.parent = self
+            states.append(state)
 
         return states
 
     def move_up(self) -> Self | None:
-        state = deepcopy(self)
+        repr = self.repr.copy()
         try:
-            state.repr.move_up()
-        except:
+            repr.move_up()
+        except RuntimeError:
             return None
 
-        state.step = self.step + 1
-        return state
+        return State.from_repr(repr, step=self.step + 1)
 
     def move_down(self) -> Self | None:
-        state = deepcopy(self)
+        repr = self.repr.copy()
         try:
-            state.repr.move_down()
-        except:
+            repr.move_down()
+        except RuntimeError:
             return None
 
-        state.step = self.step + 1
-        return state
+        return State.from_repr(repr, step=self.step + 1)
 
     def move_left(self) -> Self | None:
-        state = deepcopy(self)
+        repr = self.repr.copy()
         try:
-            state.repr.move_left()
-        except:
+            repr.move_left()
+        except RuntimeError:
             return None
 
-        state.step = self.step + 1
-        return state
+        return State.from_repr(repr, step=self.step + 1)
 
     def move_right(self) -> Self | None:
-        state = deepcopy(self)
+        repr = self.repr.copy()
         try:
-            state.repr.move_right()
-        except:
+            repr.move_right()
+        except RuntimeError:
             return None
 
-        state.step = self.step + 1
-        return state
+        return State.from_repr(repr, step=self.step + 1)
 
     def __str__(self):
         out = f"----- step {self.step}:\n"
@@ -0,0 +1,89 @@
+import json
+import resource
+import time
+import tracemalloc
+
+# expansions between two reads of the clock
+CHECK_EVERY = 1024
+
+
+class SearchStats:
+    # counters of a solver run. The algorithms update them on every expansion, every interval seconds
+    # a sample of the counters is recorded (and printed on a single status line if status is set)
+    def __init__(self, interval: float | None = 1.0, status: bool = False):
+        self.interval = interval
+        self.status = status
+        self.generated = 0
+        self.expanded = 0
+        self.duplicates = 0
+        self.reopened = 0
+        self.peak_frontier = 0
+        self.peak_memory = 0
+        self.heuristic_time = 0.0
+        self.elapsed = 0.0
+        self.samples = []
+        self.__start = None
+        self.__last_sample = None
+        self.__next_check = CHECK_EVERY
+
+    @property
+    def expansions_per_second(self) -> float:
+        return self.expanded / self.elapsed if self.elapsed > 0 else 0.0
+
+    def start(self) -> None:
+        self.__start = time.perf_counter()
+        self.__last_sample = self.__start
+
+    def stop(self) -> None:
+        self.elapsed = time.perf_counter() - self.__start
+        self.__update_peak_memory()
+        if self.interval is not None:
+            self.__sample()
+        if self.status:
+            print("")
+
+    def expand(self, frontier: int, count: int = 1) -> None:
+        self.expanded += count
+        if frontier > self.peak_frontier:
+            self.peak_frontier = frontier
+        if self.expanded >= self.__next_check:
+            self.__next_check = self.expanded + CHECK_EVERY
+            now = time.perf_counter()
+            if self.interval is not None and now - self.__last_sample >= self.interval:
+                self.__last_sample = now
+                self.elapsed = now - self.__start
+                self.__update_peak_memory()
+                self.__sample()
+
+    def to_dict(self) -> dict:
+        return {
+            "generated": self.generated,
+            "expanded": self.expanded,
+            "duplicates": self.duplicates,
+            "reopened": self.reopened,
+            "peak_frontier": self.peak_frontier,
+            "peak_memory": self.peak_memory,
+            "heuristic_time": self.heuristic_time,
+            "elapsed": self.elapsed,
+            "expansions_per_second": self.expansions_per_second,
+        }
+
+    def dump(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump({**self.to_dict(), "samples": self.samples}, f, indent=2)
+
+    def __sample(self) -> None:
+        sample = self.to_dict()
+        self.samples.append(sample)
+        if self.status:
+            print(
+                f"elapsed: {sample['elapsed']:.1f}s - expanded: {sample['expanded']} - generated: {sample['generated']} - frontier peak: {sample['peak_frontier']} - {sample['expansions_per_second']:.0f} expansions/s",
+                end="\r",
+            )
+
+    def __update_peak_memory(self) -> None:
+        # traced Python allocations when tracemalloc runs, peak resident set size of the process otherwise
+        if tracemalloc.is_tracing():
+            self.peak_memory = max(self.peak_memory, tracemalloc.get_traced_memory()[1])
+        else:
+            self.peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
@@ -1,5 +1,12 @@
 from environment import Environment
+from dyna import PrioritizedSweeping
+from planning import Planner
+from qtable import make_q_table
+from renderer import Renderer
+from telemetry import TrainingMetrics, EarlyStopping
 import numpy as np
+import os
+import policy
 import random
 import time
 
@@ -35,53 +42,161 @@ class Agent:
             - epsilon: probability to choose a random action (exploration) instead of choosing the best learned Q-value action (exploitation)
     """
 
-    def __init__(self, env: Environment):
+    def __init__(self, env: Environment, dtype=np.float64, backend="dense", q_table=None):
         """
         Agent constructor
 
         Args:
             env (Environment): the environment that the agent will explore
+            dtype (np dtype): the type of the Q-values, np.float32 or np.float64
+            backend (str): the Q-table backend (see make_q_table): dense (a row for every state), compact (a row for every state reachable from the starting position) or lazy (a row for every updated state)
+            q_table (np array | None): an existing dense Q-table to train in place (e.g. in shared memory) instead of allocating one
 
         Attributes:
             env (Environment): the environment that the agent will explore
-            q_table (np array): the Q-table with shape (state space, action space)
+            encoding (StateEncoding): the encoding of the states shared with the environment, its state indexes are the rows of the Q-table
+            q_table (np array | CompactQTable | LazyQTable): the Q-table with shape (state space, action space). The planned and the loaded Q-tables are dense
             trained (bool): set to True if the training is completed
+            episodes (int): the episodes executed by the training, fewer than requested if it stopped early
+            steps (int): the real steps of the Agent in the environment during the training
+            model (PrioritizedSweeping | None): the model of the observed transitions of the Dyna-Q training, kept if the Agent is trained again
+            metrics (TrainingMetrics | None): the learning curve of the training, if it was recorded
+            hyperparameters (dict): the hyperparameters of the training (or of the planning) that produced the Q-table
+            policy_file (str | None): the policy file of the Q-table, if it was loaded from a file
         """
+        if np.dtype(dtype) not in (np.float32, np.float64):
+            raise RuntimeError("The Q-table type must be float32 or float64")
+
         self.env = env
-        # Q-table: a row for every state, a column for every action, all Q-values are 0
-        self.q_table = np.zeros(
-            (self.env.state_space, self.env.action_space), dtype=int
-        )
+        self.encoding = env.encoding
+        # Q-table: a row for every state, a column for every action, all Q-values are 0. The Q-values are floats, so that the updates are not truncated
+        self.q_table = make_q_table(env, backend=backend, dtype=dtype) if q_table is None else q_table
         self.trained = False
-
-    def train(self, alpha=0.3, gamma=0.9, epsilon=0.3, episodes=5000) -> None:
+        self.episodes = 0
+        self.steps = 0
+        self.model = None
+        self.metrics = None
+        self.hyperparameters = {}
+        self.policy_file = None
+
+    def train(
+        self,
+        alpha=0.3,
+        gamma=0.9,
+        epsilon=0.3,
+        episodes=5000,
+        num_envs=1,
+        patience=None,
+        tolerance=None,
+        metrics_file=None,
+        metrics_interval=1,
+        planning_steps=0,
+    ) -> None:
         """
-        The function that executes the training of the agent
+        The function that executes the training of the agent: Q-learning, or Dyna-Q with prioritized sweeping if planning_steps is larger than 0
 
         Args:
             alpha (float): learning rate hyperparameter
             gamma (float): discount factor hyperparameter
             epsilon (float): probability of choosing exploration instead of exploitation hyperparameter
             episodes (int): total number of episodes
+            num_envs (int): number of episodes advanced together in lock-step, with 1 the episodes run one at a time
+            patience (int | None): stop the training when, for patience consecutive episodes, the greedy policy reaches the exit with the same steps (or the Q-values change less than tolerance). None to always run all the episodes
+            tolerance (float | None): largest change of a Q-value in an episode for the training to be converged, used with patience
+            metrics_file (str | None): CSV (.csv) or JSONL file where the per-episode metrics are streamed: return, length, collisions, largest Q-value change and greedy policy steps
+            metrics_interval (int): number of episodes between two episodes written to metrics_file
+            planning_steps (int): backups simulated from a model of the observed transitions after every real step, ordered by their Bellman error (see PrioritizedSweeping). 0 for Q-learning only
         """
         # do not re-run training if already executed
         if self.trained:
             return
 
+        if planning_steps > 0 and num_envs > 1:
+            raise RuntimeError("The Dyna-Q training (planning_steps > 0) runs one episode at a time (num_envs = 1)")
+
+        self.hyperparameters = {
+            "method": "dyna-q" if planning_steps > 0 else "q-learning",
+            "alpha": alpha,
+            "gamma": gamma,
+            "epsilon": epsilon,
+            "episodes": episodes,
+            "num_envs": num_envs,
+        }
+        sweeping = None
+        if planning_steps > 0:
+            self.hyperparameters["planning_steps"] = planning_steps
+            if self.model is None:
+                self.model = PrioritizedSweeping(self.env, planning_steps, alpha, gamma)
+            sweeping = self.model
+            sweeping.planning_steps, sweeping.alpha, sweeping.gamma = planning_steps, alpha, gamma
+            sweeping.backups = 0
+        self.metrics = TrainingMetrics(metrics_file, metrics_interval) if metrics_file is not None else None
+        stopping = EarlyStopping(patience, tolerance) if patience is not None else None
+
+        start = time.perf_counter()
+        try:
+            if num_envs > 1:
+                total_steps = self.__train_vectorized(alpha, gamma, epsilon, episodes, num_envs, stopping)
+            else:
+                total_steps = self.__train(alpha, gamma, epsilon, episodes, stopping, sweeping)
+        finally:
+            if self.metrics is not None:
+                self.metrics.close()
+        elapsed = time.perf_counter() - start
+        self.steps = total_steps
+
+        print("")
+        if self.episodes < episodes:
+            print(f"training converged after {self.episodes} episodes")
+        print("training completed")
+        print(
+            f"{total_steps} steps in {elapsed:.2f}s - {total_steps / elapsed if elapsed > 0 else 0:.0f} steps/s"
+        )
+        if sweeping is not None:
+            print(f"{sweeping.backups} planning backups")
+
+        self.trained = True
+
+    def __train(
+        self,
+        alpha: float,
+        gamma: float,
+        epsilon: float,
+        episodes: int,
+        stopping: EarlyStopping | None,
+        sweeping: PrioritizedSweeping | None,
+    ) -> int:
+        """
+        The function that executes the training of the agent one episode at a time
+
+        Args:
+            alpha (float): learning rate hyperparameter
+            gamma (float): discount factor hyperparameter
+            epsilon (float): probability of choosing exploration instead of exploitation hyperparameter
+            episodes (int): total number of episodes
+            stopping (EarlyStopping | None): the convergence test that stops the training early
+            sweeping (PrioritizedSweeping | None): the model-based planning executed after every real step
+
+        Returns:
+            int: the total steps of the Agent in all the episodes
+        """
         state = self.env
-        rows, cols = state.shape
+        total_steps = 0
 
         # for each episode, the agent goes from initial state to final state, and we update the Q-table
         for i in range(1, episodes + 1):
             # reset state
             state.reset()
+            # the grid contains all state, the environment gives the current state_index from the agent position
+            state_index = state.state_index
+            done = False
+            # the metrics of the episode
+            episode_return = 0
+            collisions = 0
+            q_delta = 0.0
 
             # explore environment from initial state to final state
-            while not state.done:
-                # the grid contains all state, we get the current state_index from the agent position
-                agent_x, agent_y = state.agent_pos
-                state_index = agent_x * rows + agent_y
-
+            while not done:
                 # random.uniform(0, 1) returns a random float number in the interval [0, 1]
                 if random.uniform(0, 1) < epsilon:
                     # explore action space: choose a random action (actions are 0, 1, 2, 3)
@@ -91,13 +206,8 @@ class Agent:
                     # Q(state, action), so with Q(state) we have all the array of actions from state. With argmax we get the action_index (0, 1, 2, 3) with max Q(state, action) value (Q-value)
                     action_index = np.argmax(self.q_table[state_index])
 
-                # we get the action object from the action_index
-                action = state.actions[action_index]
-                # we compute the next state from the current state, so we get the next state and the reward
-                next_state, reward = state.move_agent(action)
-                # we get the new state_index from agent position
-                next_agent_x, next_agent_y = next_state.agent_pos
-                next_state_index = next_agent_x * rows + next_agent_y
+                # we execute the action in place in the environment, so we get the next state_index, the reward and if the exit is reached
+                next_state_index, reward, done = state.step(action_index)
 
                 # we get the old Q(state, action) for old state from Q-table
                 old_value = self.q_table[state_index, action_index]
@@ -111,57 +221,294 @@ class Agent:
                 # we update the Q(state, action) in the Q-table
                 self.q_table[state_index, action_index] = new_value
 
+                # Dyna-Q: the step is recorded in the model, then the Q-values are updated with simulated backups
+                if sweeping is not None:
+                    sweeping.observe(self.q_table, state_index, action_index, next_state_index, reward, state.steps)
+                    sweeping.plan(self.q_table)
+
+                episode_return += reward
+                collisions += state.collision
+                q_delta = max(q_delta, abs(new_value - old_value))
+
                 # the agent is in the next_state
-                state = next_state
+                state_index = next_state_index
 
+            total_steps += state.steps
             # we print the current episode
             print(f"Episode: {i}", end="\r")
 
-        print("")
-        print("training completed")
+            if self.__end_episode(i, episode_return, state.steps, collisions, q_delta, stopping):
+                break
+
+        return total_steps
+
+    def __train_vectorized(
+        self,
+        alpha: float,
+        gamma: float,
+        epsilon: float,
+        episodes: int,
+        num_envs: int,
+        stopping: EarlyStopping | None,
+    ) -> int:
+        """
+        The function that executes the training of the agent advancing num_envs independent episodes on the same arena in lock-step. Every step picks the actions of all the episodes with one epsilon-greedy draw, looks up their next states in the transition table and updates the Q-table with one scatter operation. When the same (state, action) pair is updated by several episodes in the same step, the last update is kept
+
+        Args:
+            alpha (float): learning rate hyperparameter
+            gamma (float): discount factor hyperparameter
+            epsilon (float): probability of choosing exploration instead of exploitation hyperparameter
+            episodes (int): total number of episodes
+            num_envs (int): number of episodes advanced together
+            stopping (EarlyStopping | None): the convergence test that stops the training early
+
+        Returns:
+            int: the total steps of the Agent in all the episodes
+        """
+        env = self.env
+        # the generator is seeded from the random module, so that random.seed makes the training reproducible
+        rng = np.random.default_rng(random.getrandbits(64))
+        # no more episodes than requested are started
+        num_envs = min(num_envs, episodes)
+
+        # the state index and the step count of every running episode
+        state_indexes = np.full(num_envs, env.start_index)
+        steps = np.zeros(num_envs, dtype=np.int64)
+        # the metrics of every running episode
+        returns = np.zeros(num_envs)
+        collisions = np.zeros(num_envs, dtype=np.int64)
+        q_deltas = np.zeros(num_envs)
+        # running episodes: an episode that reaches the exit restarts only if there are episodes left to start
+        active = np.ones(num_envs, dtype=bool)
+        started = num_envs
+        completed = 0
+        total_steps = 0
+
+        while active.any():
+            envs = np.flatnonzero(active)
+            current = state_indexes[envs]
+
+            # epsilon-greedy draw for all the episodes: random actions where explore is True, the actions that maximize the Q-value otherwise
+            explore = rng.random(envs.size) < epsilon
+            action_indexes = np.where(
+                explore,
+                rng.integers(0, env.action_space, size=envs.size),
+                np.argmax(self.q_table[current], axis=1),
+            )
+
+            # we execute the actions in all the episodes
+            steps[envs] += 1
+            next_indexes, rewards, done = env.step_many(current, action_indexes, steps[envs])
+
+            # we apply the Q-learning formula to all the (state, action) pairs at once
+            old_values = self.q_table[current, action_indexes]
+            next_max = np.max(self.q_table[next_indexes], axis=1)
+            new_values = (1 - alpha) * old_values + alpha * (rewards + gamma * next_max)
+            self.q_table[current, action_indexes] = new_values
+
+            returns[envs] += rewards
+            collisions[envs] += next_indexes == current
+            q_deltas[envs] = np.maximum(q_deltas[envs], np.abs(new_values - old_values))
+
+            # the agents are in the next states, the episodes that reached the exit restart from the initial state
+            state_indexes[envs] = np.where(done, env.start_index, next_indexes)
+            finished = envs[done]
+            total_steps += int(steps[finished].sum())
+
+            # the finished episodes are recorded one at a time, the greedy policy is the same for all of them
+            converged = False
+            greedy_length = None
+            if finished.size != 0 and (stopping is not None or self.metrics is not None):
+                greedy_length = self.greedy_path_length()
+            for env_index in finished.tolist():
+                completed += 1
+                converged = self.__end_episode(
+                    completed,
+                    returns[env_index],
+                    steps[env_index],
+                    collisions[env_index],
+                    q_deltas[env_index],
+                    stopping,
+                    greedy_length,
+                )
+                if converged:
+                    break
+            if converged:
+                break
+
+            steps[finished] = 0
+            returns[finished] = 0
+            collisions[finished] = 0
+            q_deltas[finished] = 0
+
+            # the episodes that cannot restart are stopped
+            restarts = min(finished.size, episodes - started)
+            started += restarts
+            active[finished[restarts:]] = False
+
+            # we print the completed episodes
+            if finished.size != 0:
+                print(f"Episode: {completed}", end="\r")
+
+        return total_steps
+
+    def plan(self, method="value-iteration", gamma=0.9, tolerance=1e-6) -> None:
+        """
+        The function that replaces the training of the agent with the exact solution of the maze MDP (see Planner): the Q-table is set to the optimal Q-values, so that exec follows an optimal policy
+
+        Args:
+            method (str): value-iteration or policy-iteration
+            gamma (float): discount factor hyperparameter (0 <= gamma < 1)
+            tolerance (float): the largest change of a state value of the last iteration
+        """
+        # do not re-run planning if the Q-table is already trained
+        if self.trained:
+            return
+
+        planner = Planner(self.env, gamma=gamma, dtype=self.q_table.dtype)
+
+        start = time.perf_counter()
+        if method == "value-iteration":
+            self.q_table = planner.value_iteration(tolerance=tolerance)
+        elif method == "policy-iteration":
+            self.q_table = planner.policy_iteration(tolerance=tolerance)
+        else:
+            raise RuntimeError(f"Unknown planning method '{method}'")
+        elapsed = time.perf_counter() - start
 
+        print(f"{method} completed: {planner.iterations} iterations in {elapsed:.2f}s")
+
+        self.hyperparameters = {"method": method, "gamma": gamma, "tolerance": tolerance}
         self.trained = True
 
-    def exec(self) -> None:
+    def save_policy(self, path: str) -> str:
         """
-        The function that executes the agent exploration of the environment. The explored states are printed to stdout
+        The function that saves the Q-table together with the arena and the hyperparameters
+
+        Args:
+            path (str): the policy file (.npz) or a directory, where the file is named after the content hash of the arena
+
+        Returns:
+            str: the policy file
         """
-        state = self.env
-        rows, cols = state.shape
-        # we reset the state and print it
-        state.reset()
-        self.print_state(state)
+        arena_hash = self.env.arena_hash()
+        path = policy.policy_path(path, arena_hash)
+        if self.policy_file is not None and os.path.abspath(path) == os.path.abspath(self.policy_file):
+            # the Q-table is memory-mapped from this same file, it is already saved
+            return path
 
-        # explore environment from initial state to final state
-        while not state.done:
-            # the grid contains all state, we get the current state_index from the agent position
-            agent_x, agent_y = state.agent_pos
-            state_index = agent_x * rows + agent_y
+        policy.save(path, self.q_table, self.env.arena_array(), arena_hash, self.hyperparameters)
+        return path
 
-            # we exploit the Q-table to choose the best action to take in the current state
-            action_index = np.argmax(self.q_table[state_index])
-            # we get the action object from the action_index
-            action = state.actions[action_index]
+    def load_policy(self, path: str, mmap=True) -> str:
+        """
+        The function that loads a Q-table saved with save_policy, replacing the training. The policy must be the policy of the arena of the environment
 
-            # we compute the next state from the current state, so we get the next state and the reward
-            state, reward = state.move_agent(action)
+        Args:
+            path (str): the policy file (.npz) or a directory, where the file is named after the content hash of the arena
+            mmap (bool): memory-map the Q-table instead of reading it (the Q-table is then read-only)
 
-            # we print the new state
-            self.print_state(state)
-            # we sleep so that we can follow the steps of the agent during the exploration
-            time.sleep(1)
+        Returns:
+            str: the policy file
+        """
+        arena_hash = self.env.arena_hash()
+        path = policy.policy_path(path, arena_hash)
+        loaded = policy.load(path, mmap=mmap)
+        if loaded["arena_hash"] != arena_hash:
+            raise RuntimeError(f"'{path}' is the policy of another arena")
+        if loaded["q_table"].shape != self.q_table.shape:
+            raise RuntimeError(f"'{path}' has a Q-table of shape {loaded['q_table'].shape}, expected {self.q_table.shape}")
+
+        self.q_table = loaded["q_table"]
+        self.hyperparameters = loaded["hyperparameters"]
+        self.policy_file = path
+        self.trained = True
+        return path
+
+    def __end_episode(
+        self,
+        episode: int,
+        episode_return: float,
+        length: int,
+        collisions: int,
+        q_delta: float,
+        stopping: EarlyStopping | None,
+        greedy_length=-1,
+    ) -> bool:
+        """
+        Function that records the metrics of a completed episode and runs the convergence test
 
-    def print_state(self, state: Environment) -> None:
+        Args:
+            episode (int): the number of the episode, starting from 1
+            episode_return (float): the sum of the rewards of the episode
+            length (int): the steps of the episode
+            collisions (int): the collisions of the episode
+            q_delta (float): the largest change of a Q-value during the episode
+            stopping (EarlyStopping | None): the convergence test that stops the training early
+            greedy_length (int | None): the steps of the greedy policy to reach the exit, -1 to compute them only if they are needed
+
+        Returns:
+            bool: True if the training converged
         """
-        Function that prints a state to stdout
+        self.episodes = episode
+
+        recorded = self.metrics is not None and episode % self.metrics.interval == 0
+        if greedy_length == -1:
+            greedy_length = self.greedy_path_length() if stopping is not None or recorded else None
+
+        if self.metrics is not None:
+            self.metrics.record(episode, episode_return, length, collisions, q_delta, greedy_length)
+
+        return stopping is not None and stopping.update(q_delta, greedy_length)
+
+    def greedy_path_length(self, max_steps=None) -> int | None:
+        """
+        The function that follows the greedy policy of the Q-table from the initial state, without printing
 
         Args:
-            state (Environment): the state to print
+            max_steps (int | None): the maximum number of steps, by default the state space (a longer greedy path is a loop)
+
+        Returns:
+            int | None: the steps needed to reach the exit, None if it is not reached within max_steps
         """
-        print(state, end="")
-        print(f"collision: {state.collision}")
-        print(f"   action: {state.last_action}")
-        print(f"     done: {state.done}")
-        print(f"     step: {state.step}")
-        print("")
-        print("")
+        trajectory, _ = self.exec(headless=True, max_steps=max_steps)
+        return len(trajectory) - 1 if self.env.done else None
+
+    def exec(self, headless=False, fps=1.0, max_steps=None) -> tuple:
+        """
+        The function that executes the agent exploration of the environment following the greedy policy of the Q-table
+
+        Args:
+            headless (bool): do not render the explored states and do not wait between the steps
+            fps (float): the steps rendered per second, 0 to render them as fast as possible
+            max_steps (int | None): the maximum number of steps, by default the state space (a longer greedy path is a loop)
+
+        Returns:
+            tuple: (trajectory, total reward) pair, the trajectory is the list of the (x, y) positions of the Agent from the initial state. The exit is reached if env.done is True
+        """
+        state = self.env
+        max_steps = max_steps if max_steps is not None else state.state_space
+        renderer = Renderer(state, fps=fps) if not headless else None
+
+        # we reset the state and render it
+        state.reset()
+        trajectory = [state.agent_pos]
+        total_reward = 0
+        if renderer is not None:
+            renderer.render()
+
+        # explore environment from initial state to final state
+        while not state.done and state.steps < max_steps:
+            # we exploit the Q-table to choose the best action to take in the current state
+            action_index = int(np.argmax(self.q_table[state.state_index]))
+
+            # we execute the action in place in the environment
+            _, reward, _ = state.step(action_index)
+            trajectory.append(state.agent_pos)
+            total_reward += reward
+
+            # we render the new state, the renderer waits so that we can follow the steps of the agent during the exploration
+            if renderer is not None:
+                renderer.render()
+
+        return (trajectory, total_reward)
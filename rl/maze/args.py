@@ -1,4 +1,5 @@
 import argparse
+import os
 
 
 class Args:
@@ -40,6 +41,78 @@ class Args:
             default=5000,
         )
 
+        self.parser.add_argument(
+            "-n",
+            "--num-envs",
+            help="set number of episodes that the Agent's Q-learning algorithm advances together in lock-step with NumPy arrays: [1, n]. Default value: 1 (one episode at a time)",
+            type=Args.restricted_1_n_int_type,
+            default=1,
+        )
+
+        self.parser.add_argument(
+            "-ps",
+            "--planning-steps",
+            help="set number of Dyna-Q planning backups after every real step of the Agent, simulated from a model of the observed transitions in order of their Bellman error (prioritized sweeping): [0, n]. Default value: 0 (Q-learning only)",
+            type=Args.restricted_0_n_int_type,
+            default=0,
+        )
+
+        self.parser.add_argument(
+            "-p",
+            "--patience",
+            help="stop the training when, for this number of consecutive episodes, the greedy policy reaches the exit with the same steps (or the Q-values change less than --tolerance): [1, n]. Default value: run all the episodes",
+            type=Args.restricted_1_n_int_type,
+            default=None,
+        )
+
+        self.parser.add_argument(
+            "-t",
+            "--tolerance",
+            help="set largest change of a Q-value in an episode for the training to be converged, used with --patience. Default value: not used",
+            type=float,
+            default=None,
+        )
+
+        self.parser.add_argument(
+            "-m",
+            "--metrics-file",
+            help="set CSV (.csv) or JSONL file where the return, length, collisions, largest Q-value change and greedy policy steps of the episodes are streamed. Default value: not written",
+            type=str,
+            default=None,
+        )
+
+        self.parser.add_argument(
+            "-mi",
+            "--metrics-interval",
+            help="set number of episodes between two episodes written to the metrics file: [1, n]. Default value: 1",
+            type=Args.restricted_1_n_int_type,
+            default=1,
+        )
+
+        self.parser.add_argument(
+            "-pl",
+            "--plan",
+            help="replace the Q-learning training with the exact solution of the maze MDP computed with value-iteration or policy-iteration, using the Gamma hyperparameter (it must be lower than 1). Default value: Q-learning training",
+            choices=["value-iteration", "policy-iteration"],
+            default=None,
+        )
+
+        self.parser.add_argument(
+            "-d",
+            "--dtype",
+            help="set type of the Q-values of the Agent's Q-table: float32 or float64. Default value: float64",
+            choices=["float32", "float64"],
+            default="float64",
+        )
+
+        self.parser.add_argument(
+            "-qt",
+            "--q-table",
+            help="set backend of the Agent's Q-table: dense (a row for every state), compact (a row for every state reachable from the starting position) or lazy (a row for every state updated by the training). Default value: dense",
+            choices=["dense", "compact", "lazy"],
+            default="dense",
+        )
+
         self.parser.add_argument(
             "-s",
             "--shape",
@@ -48,7 +121,137 @@ class Args:
             default=(10, 10),
         )
 
-        return self.parser.parse_args()
+        self.parser.add_argument(
+            "-op",
+            "--obstacle-prob",
+            help="set probability of an obstacle in a generated arena: [0, 1]. Default value: 0.2",
+            type=Args.restricted_0_1_float_type,
+            default=0.2,
+        )
+
+        self.parser.add_argument(
+            "--seed",
+            help="set seed of the generated arena and of the training, the arena is used without asking to generate a new one. Default value: random arena, confirmed interactively when stdin is a terminal",
+            type=Args.restricted_0_n_int_type,
+            default=None,
+        )
+
+        self.parser.add_argument(
+            "-af",
+            "--arena-file",
+            help="set maze file of the arena, its format is chosen by the extension: .txt (one character per tile), .mzb (bit-packed obstacle mask, memory-mapped) or .npy (one byte per tile, memory-mapped). The arena is loaded from it if it exists, otherwise the generated arena is saved to it. Default value: generated arena",
+            type=str,
+            default=None,
+        )
+
+        self.parser.add_argument(
+            "-sp",
+            "--save-policy",
+            help="set file (.npz) where the Q-table is saved together with the arena and the hyperparameters. With a directory, the file is named after the content hash of the arena. Default value: not saved",
+            type=str,
+            default=None,
+        )
+
+        self.parser.add_argument(
+            "-lp",
+            "--load-policy",
+            help="set file (.npz) or directory of the policy to load instead of training the Agent, the Q-table is memory-mapped. Without --arena-file the arena of the policy file is used. Default value: not loaded",
+            type=str,
+            default=None,
+        )
+
+        self.parser.add_argument(
+            "-ev",
+            "--evaluate",
+            help="evaluate the greedy policy from every free cell of the arena before the execution: coverage (cells that reach the exit), optimality (shortest distance / path length), loops and collisions",
+            action="store_true",
+        )
+
+        self.parser.add_argument(
+            "--headless",
+            help="execute the greedy policy without rendering it and without waiting between the steps, only the trajectory length and the total reward are printed",
+            action="store_true",
+        )
+
+        self.parser.add_argument(
+            "--fps",
+            help="set steps rendered per second during the execution, 0 renders them as fast as possible: [0, n]. Default value: 1",
+            type=Args.restricted_0_n_float_type,
+            default=1.0,
+        )
+
+        self.parser.add_argument(
+            "--hogwild",
+            help="train the Agent with --workers processes that update a single Q-table in shared memory without locks, every worker with its own seed (--seed + worker, from 0 without --seed) and an epsilon from --epsilon down to --epsilon^3. The training throughput and the episodes and steps of every worker are printed",
+            action="store_true",
+        )
+
+        self.parser.add_argument(
+            "--sweep",
+            help="train one Agent per hyperparameter configuration across a pool of processes and print the configurations ranked by the return of their greedy policy, their episodes to converge (see --patience, 20 by default) and their wall time, instead of training and executing a single Agent",
+            action="store_true",
+        )
+
+        self.parser.add_argument(
+            "--alpha-grid",
+            help="set Alpha values of the sweep, comma separated: [0, 1]. Default value: --alpha",
+            type=Args.float_list_type,
+            default=None,
+        )
+
+        self.parser.add_argument(
+            "--gamma-grid",
+            help="set Gamma values of the sweep, comma separated: [0, 1]. Default value: --gamma",
+            type=Args.float_list_type,
+            default=None,
+        )
+
+        self.parser.add_argument(
+            "--epsilon-grid",
+            help="set Epsilon values of the sweep, comma separated: [0, 1]. Default value: --epsilon",
+            type=Args.float_list_type,
+            default=None,
+        )
+
+        self.parser.add_argument(
+            "--samples",
+            help="set number of random configurations of the sweep, every hyperparameter is drawn between the smallest and the largest value of its grid: [1, n]. Default value: every combination of the grids",
+            type=Args.restricted_1_n_int_type,
+            default=None,
+        )
+
+        self.parser.add_argument(
+            "--seeds",
+            help="set number of seeds of every configuration of the sweep: [1, n]. Default value: 1",
+            type=Args.restricted_1_n_int_type,
+            default=1,
+        )
+
+        self.parser.add_argument(
+            "-w",
+            "--workers",
+            help="set number of worker processes of the sweep and of the Hogwild training: [1, n]. Default value: number of CPUs",
+            type=Args.restricted_1_n_int_type,
+            default=os.cpu_count(),
+        )
+
+        self.parser.add_argument(
+            "--sweep-output",
+            help="set JSONL file where the ranked results of the sweep are written. Default value: not written",
+            type=str,
+            default=None,
+        )
+
+        args = self.parser.parse_args()
+        if args.tolerance is not None and args.patience is None:
+            self.parser.error("--tolerance requires --patience")
+        if args.hogwild and (args.metrics_file is not None or args.q_table != "dense"):
+            self.parser.error("--hogwild requires a dense --q-table and no --metrics-file")
+        if args.planning_steps > 0 and args.num_envs > 1:
+            self.parser.error("--planning-steps requires --num-envs 1")
+        if args.plan is not None and args.gamma >= 1:
+            self.parser.error("--plan requires a Gamma hyperparameter lower than 1")
+        return args
 
     @staticmethod
     def restricted_0_1_float_type(x):
@@ -62,6 +265,18 @@ class Args:
 
         return f
 
+    @staticmethod
+    def restricted_0_n_float_type(x):
+        try:
+            f = float(x)
+        except:
+            raise argparse.ArgumentTypeError(f"'{x}' is not a float")
+
+        if f < 0.0:
+            raise argparse.ArgumentTypeError(f"'{x}' is not in range [0, n]")
+
+        return f
+
     @staticmethod
     def restricted_0_n_int_type(x):
         try:
@@ -74,6 +289,27 @@ class Args:
 
         return i
 
+    @staticmethod
+    def restricted_1_n_int_type(x):
+        try:
+            i = int(x)
+        except:
+            raise argparse.ArgumentTypeError(f"'{x}' is not a int")
+
+        if i < 1:
+            raise argparse.ArgumentTypeError(f"'{x}' is not in range [1, n]")
+
+        return i
+
+    @staticmethod
+    def float_list_type(x):
+        try:
+            values = [Args.restricted_0_1_float_type(value) for value in x.split(",")]
+        except:
+            raise argparse.ArgumentTypeError(f"'{x}' is not a comma separated list of floats in range [0, 1]")
+
+        return values
+
     @staticmethod
     def arena_shape_type(x):
         try:
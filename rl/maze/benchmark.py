@@ -0,0 +1,478 @@
+from environment import Environment
+from agent import Agent
+from collections import deque
+import argparse
+import contextlib
+import io
+import hogwild
+import json
+import multiprocessing as mp
+import numpy as np
+import os
+import qtable
+import random
+import resource
+import sys
+import time
+
+# (name, shape (None for the default arena), obstacle probability, seed, episodes, num_envs, planning_steps, maximum episodes to converge (None to skip the convergence)) of every case of the suite
+SUITE = (
+    ("default-10x10", None, 0.0, 0, 500, 1, 0, 3000),
+    ("default-10x10/num-envs-64", None, 0.0, 0, 5000, 64, 0, None),
+    ("default-10x10/dyna-q-5", None, 0.0, 0, 100, 1, 5, 1000),
+    ("10x10-p0.3", (10, 10), 0.3, 1, 500, 1, 0, 3000),
+    ("20x20-p0.1/dyna-q-20", (20, 20), 0.1, 0, 50, 1, 20, 500),
+    ("50x50-p0.1", (50, 50), 0.1, 0, 20, 1, 0, None),
+    ("50x50-p0.3", (50, 50), 0.3, 0, 20, 1, 0, None),
+    ("50x50-p0.1/num-envs-64", (50, 50), 0.1, 0, 64, 64, 0, None),
+    ("200x200-p0.1", (200, 200), 0.1, 0, 2, 1, 0, None),
+    ("200x200-p0.3", (200, 200), 0.3, 0, 2, 1, 0, None),
+)
+
+# default file of the stored baseline
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "baseline.json")
+
+
+def shortest_path_length(env: Environment) -> int | None:
+    """
+    Function that computes the length of the shortest path from the Agent starting position to the Exit with a BFS over the transition table
+
+    Args:
+        env (Environment): the environment
+
+    Returns:
+        int | None: the length of the shortest path, None if the Exit cannot be reached
+    """
+    distance = {env.start_index: 0}
+    queue = deque([env.start_index])
+    while len(queue) != 0:
+        state_index = queue.popleft()
+        if state_index == env.exit_index:
+            return distance[state_index]
+        for next_state_index in env.transitions[state_index].tolist():
+            if next_state_index not in distance:
+                distance[next_state_index] = distance[state_index] + 1
+                queue.append(next_state_index)
+    return None
+
+
+def episodes_to_convergence(
+    env: Environment,
+    dtype: str,
+    seed: int,
+    max_episodes: int,
+    every: int,
+    alpha=0.3,
+    gamma=0.9,
+    epsilon=0.3,
+) -> int | None:
+    """
+    Function that trains an Agent every episodes at a time until its greedy policy follows a shortest path to the Exit
+
+    Args:
+        env (Environment): the environment
+        dtype (str): the type of the Q-values: int (truncated Q-values, the original Q-table), float32 or float64
+        seed (int): the seed of the training
+        max_episodes (int): the maximum number of episodes
+        every (int): the number of episodes between two checks of the greedy policy
+
+    Returns:
+        int | None: the episodes needed to converge, None if the Agent did not converge within max_episodes
+    """
+    target = shortest_path_length(env)
+    random.seed(seed)
+    agent = Agent(env, dtype=np.float64 if dtype == "int" else np.dtype(dtype))
+    if dtype == "int":
+        agent.q_table = np.zeros_like(agent.q_table, dtype=int)
+
+    for episodes in range(every, max_episodes + 1, every):
+        # the training continues from the current Q-table
+        agent.trained = False
+        with contextlib.redirect_stdout(io.StringIO()):
+            agent.train(alpha=alpha, gamma=gamma, epsilon=epsilon, episodes=every)
+        if agent.greedy_path_length(4 * target) == target:
+            return episodes
+    return None
+
+
+def make_arena(shape: tuple | None, seed: int, obstacle_prob: float) -> Environment:
+    """
+    Function that returns the default arena (shape None) or a seeded generated arena where the Exit can be reached
+
+    Args:
+        shape (tuple | None): the (x: int, y: int) shape of the arena
+        seed (int): the seed of the generation
+        obstacle_prob (float): the probability [0, 1] of the generation of an obstacle
+
+    Returns:
+        Environment: the environment
+    """
+    if shape is None:
+        env = Environment()
+        env.load_default()
+        return env
+
+    env = Environment(shape=shape)
+    env.generate_arena(obstacle_prob=obstacle_prob, seed=seed)
+    return env
+
+
+def convergence(seeds: int, max_episodes: int, every: int) -> None:
+    """
+    Function that prints the episodes needed to converge with the original integer Q-table and with the float Q-tables
+
+    Args:
+        seeds (int): the number of training seeds of every arena
+        max_episodes (int): the maximum number of episodes
+        every (int): the number of episodes between two checks of the greedy policy
+    """
+    # the original integer Q-table is run with the row-major encoding: with the original x * rows + y state index the rectangular arenas either share states (10x20) or overflow the Q-table (20x10)
+    arenas = [
+        ("default 10x10", None),
+        ("generated 20x20", (20, 20)),
+        ("generated 10x20", (10, 20)),
+        ("generated 20x10", (20, 10)),
+    ]
+    for name, shape in arenas:
+        env = make_arena(shape, seed=0, obstacle_prob=0.1)
+        print(f"{name} arena, shortest path: {shortest_path_length(env)} steps")
+        for dtype in ("int", "float32", "float64"):
+            results = [episodes_to_convergence(env, dtype, seed, max_episodes, every) for seed in range(0, seeds)]
+            converged = [episodes for episodes in results if episodes is not None]
+            mean = f"{np.mean(converged):.0f}" if len(converged) != 0 else "-"
+            print(
+                f"  {dtype:>7}: episodes to convergence: {results} - converged: {len(converged)}/{seeds} - mean: {mean}"
+            )
+
+
+def steps_to_optimal(
+    env: Environment,
+    planning_steps: int,
+    seed: int,
+    max_episodes: int,
+    every: int,
+    alpha=0.3,
+    gamma=0.9,
+    epsilon=0.3,
+) -> tuple | None:
+    """
+    Function that trains an Agent every episodes at a time, with Q-learning or with Dyna-Q, until its greedy policy follows a shortest path to the Exit
+
+    Args:
+        env (Environment): the environment
+        planning_steps (int): the planning backups after every real step, 0 for Q-learning
+        seed (int): the seed of the training
+        max_episodes (int): the maximum number of episodes
+        every (int): the number of episodes between two checks of the greedy policy
+
+    Returns:
+        tuple | None: (episodes, environment steps, wall time) needed to converge, None if the Agent did not converge within max_episodes
+    """
+    target = shortest_path_length(env)
+    random.seed(seed)
+    agent = Agent(env)
+
+    steps = 0
+    start = time.perf_counter()
+    for episodes in range(every, max_episodes + 1, every):
+        # the training continues from the current Q-table and from the model of Dyna-Q
+        agent.trained = False
+        with contextlib.redirect_stdout(io.StringIO()):
+            agent.train(alpha=alpha, gamma=gamma, epsilon=epsilon, episodes=every, planning_steps=planning_steps)
+        steps += agent.steps
+        if agent.greedy_path_length(4 * target) == target:
+            return (episodes, steps, time.perf_counter() - start)
+    return None
+
+
+def sample_efficiency(seeds: int, max_episodes: int, every: int, planning_steps: list) -> None:
+    """
+    Function that prints the wall time and the environment steps needed to reach a shortest path with Q-learning and with Dyna-Q
+
+    Args:
+        seeds (int): the number of training seeds of every arena
+        max_episodes (int): the maximum number of episodes
+        every (int): the number of episodes between two checks of the greedy policy
+        planning_steps (list): the planning backups after every real step of every run, 0 for Q-learning
+    """
+    arenas = [
+        ("default 10x10", None),
+        ("generated 20x20", (20, 20)),
+        ("generated 50x50", (50, 50)),
+    ]
+    for name, shape in arenas:
+        env = make_arena(shape, seed=0, obstacle_prob=0.1)
+        print(f"{name} arena, shortest path: {shortest_path_length(env)} steps")
+        for n in planning_steps:
+            results = [steps_to_optimal(env, n, seed, max_episodes, every) for seed in range(0, seeds)]
+            converged = [result for result in results if result is not None]
+            method = f"dyna-q n={n}" if n > 0 else "q-learning"
+            if len(converged) == 0:
+                print(f"  {method:>12}: converged: 0/{seeds}")
+                continue
+            episodes, steps, elapsed = np.mean(converged, axis=0)
+            print(
+                f"  {method:>12}: converged: {len(converged)}/{seeds} - mean: {episodes:.0f} episodes, {steps:.0f} env steps, {elapsed:.2f}s"
+            )
+
+
+def scaling(shape: tuple, episodes: int, worker_counts: list) -> None:
+    """
+    Function that prints the throughput of the Hogwild training with an increasing number of worker processes (weak scaling: every worker runs the same episodes)
+
+    Args:
+        shape (tuple): the (x: int, y: int) shape of the generated arena
+        episodes (int): the episodes of every worker
+        worker_counts (list): the numbers of worker processes
+    """
+    env = make_arena(shape, seed=0, obstacle_prob=0.1)
+    print(f"generated {shape[0]}x{shape[1]} arena - {episodes} episodes per worker - {os.cpu_count()} CPUs")
+    print(f"{'workers':>7} {'steps':>10} {'time':>8} {'steps/s':>10} {'speedup':>7} {'efficiency':>10}")
+
+    baseline = None
+    for workers in worker_counts:
+        agent = Agent(env)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            hogwild.train(agent, episodes=episodes * workers, workers=workers)
+        elapsed = time.perf_counter() - start
+
+        throughput = agent.steps / elapsed
+        baseline = baseline or throughput
+        print(
+            f"{workers:>7} {agent.steps:>10} {elapsed:>8.2f} {throughput:>10.0f} {throughput / baseline:>7.2f} {throughput / baseline / workers:>10.2f}"
+        )
+
+
+def check_backends(shape=(40, 40), episodes=50, seed=0) -> None:
+    """
+    Function that checks that the compact and the lazy Q-tables learn the same Q-values of the dense Q-table with the same seed. The arena is large enough that the training updates more states than the rows allocated at first by the lazy Q-table, so that its Q-values array grows during the training
+
+    Args:
+        shape (tuple): the (x: int, y: int) shape of the generated arena
+        episodes (int): the episodes of every training
+        seed (int): the seed of the arena and of the trainings
+    """
+    env = make_arena(shape, seed=seed, obstacle_prob=0.1)
+    q_tables = {}
+    for backend in qtable.BACKENDS:
+        random.seed(seed)
+        agent = Agent(env, backend=backend)
+        with contextlib.redirect_stdout(io.StringIO()):
+            agent.train(episodes=episodes)
+        q_tables[backend] = np.asarray(agent.q_table)
+
+    for backend, q_table in q_tables.items():
+        if not np.array_equal(q_table, q_tables["dense"]):
+            raise RuntimeError(f"The {backend} Q-table differs from the dense Q-table after {episodes} episodes on a {shape[0]}x{shape[1]} arena")
+    print(f"backends {', '.join(q_tables)}: same Q-table after {episodes} episodes on a {shape[0]}x{shape[1]} arena")
+
+
+def run_case(case: tuple) -> dict:
+    """
+    Function that runs a case of the suite: a seeded training of its arena and, if the case requires it, the episodes needed to follow a shortest path. It runs in a fresh worker process, so that the peak RSS is the one of the case alone
+
+    Args:
+        case (tuple): (case, repeats) pair: the case (see SUITE) and the number of timed trainings
+
+    Returns:
+        dict: the episodes and the steps of the training, its fastest wall time, its steps and episodes per second, the episodes to converge (None if not measured or not converged) and the peak RSS of the process in bytes
+    """
+    (_, shape, obstacle_prob, seed, episodes, num_envs, planning_steps, max_episodes), repeats = case
+    env = make_arena(shape, seed=seed, obstacle_prob=obstacle_prob)
+
+    # throughput of the training hot loop: the seeded training always executes the same steps, so the fastest of the repeats is the least disturbed by the rest of the machine
+    elapsed = None
+    for _ in range(0, repeats):
+        random.seed(seed)
+        agent = Agent(env)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            agent.train(episodes=episodes, num_envs=num_envs, planning_steps=planning_steps)
+        elapsed = min(elapsed, time.perf_counter() - start) if elapsed is not None else time.perf_counter() - start
+
+    # episodes needed to follow a shortest path, checked every 10 episodes
+    converged = None
+    if max_episodes is not None:
+        result = steps_to_optimal(env, planning_steps, seed, max_episodes, 10)
+        converged = result[0] if result is not None else None
+
+    return {
+        "episodes": agent.episodes,
+        "steps": agent.steps,
+        "time": round(elapsed, 6),
+        "steps_per_second": round(agent.steps / elapsed, 1) if elapsed > 0 else 0.0,
+        "episodes_per_second": round(agent.episodes / elapsed, 3) if elapsed > 0 else 0.0,
+        "episodes_to_convergence": converged,
+        "peak_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    }
+
+
+def run_suite(suite: tuple, repeats=3) -> dict:
+    """
+    Function that runs and prints every case of a suite
+
+    Args:
+        suite (tuple): the cases (see SUITE)
+        repeats (int): the number of timed trainings of every case
+
+    Returns:
+        dict: the result of every case (see run_case) by case name
+    """
+    results = {}
+    # one process per case, the cases run one at a time so that they do not disturb each other
+    with mp.Pool(1, maxtasksperchild=1) as pool:
+        for case, result in zip(suite, pool.imap(run_case, [(case, repeats) for case in suite])):
+            name = case[0]
+            results[name] = result
+            converged = result["episodes_to_convergence"] if result["episodes_to_convergence"] is not None else "-"
+            print(
+                f"  {name:<26} {result['episodes']:>4} episodes - {result['steps']:>8} steps in {result['time']:>6.2f}s - {result['steps_per_second']:>8.0f} steps/s - {result['episodes_per_second']:>8.2f} episodes/s - converged: {converged:>4} - peak RSS: {result['peak_rss'] / 2**20:.0f} MiB"
+            )
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Function that compares the results of the suite with a baseline: a case regresses when its steps per second are below (1 - threshold) times the baseline or when it needs more episodes to converge. The seeded trainings are deterministic, so a different step count means that the training itself changed and it is only reported
+
+    Args:
+        results (dict): the results of the suite (see run_suite)
+        baseline (dict): the results of the baseline
+        threshold (float): the allowed slowdown [0, 1]
+
+    Returns:
+        list: the regressions, empty if there is none
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        reference = baseline[name]
+        ratio = result["steps_per_second"] / reference["steps_per_second"] if reference["steps_per_second"] > 0 else 1.0
+        print(f"  {name:<26} {ratio:>6.2f}x the baseline throughput")
+        if ratio < 1 - threshold:
+            regressions.append(
+                f"{name}: {result['steps_per_second']:.0f} steps/s, baseline {reference['steps_per_second']:.0f} steps/s"
+            )
+        if result["steps"] != reference["steps"]:
+            print(f"  {name:<26} executed {result['steps']} steps, baseline {reference['steps']}: the training changed")
+        converged, reference_converged = result["episodes_to_convergence"], reference["episodes_to_convergence"]
+        if reference_converged is not None and (converged is None or converged > reference_converged):
+            if converged is None:
+                regressions.append(f"{name}: did not converge, baseline {reference_converged} episodes")
+            else:
+                regressions.append(f"{name}: converged after {converged} episodes, baseline {reference_converged}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the maze Q-learning and Dyna-Q training")
+    parser.add_argument(
+        "--baseline", help=f"set JSON file of the baseline of the suite. Default value: {BASELINE}", type=str, default=BASELINE
+    )
+    parser.add_argument("--save-baseline", help="store the results of the suite as the baseline", action="store_true")
+    parser.add_argument(
+        "--threshold",
+        help="set allowed slowdown of the steps per second before a case regresses: [0, 1]. Default value: 0.2",
+        type=float,
+        default=0.2,
+    )
+    parser.add_argument(
+        "--output", help="set JSON file where the results of the suite are written. Default value: not written", type=str, default=None
+    )
+    parser.add_argument(
+        "--repeats",
+        help="set number of timed trainings of every case of the suite, the fastest one is kept. Default value: 3",
+        type=int,
+        default=3,
+    )
+    parser.add_argument(
+        "--dtypes",
+        help="compare the episodes needed to converge with the original integer Q-table and with the float Q-tables, instead of the suite",
+        action="store_true",
+    )
+    parser.add_argument("--seeds", help="set number of training seeds. Default value: 5", type=int, default=5)
+    parser.add_argument(
+        "--max-episodes", help="set maximum number of episodes. Default value: 3000", type=int, default=3000
+    )
+    parser.add_argument(
+        "--every",
+        help="set number of episodes between two checks of the greedy policy. Default value: 50",
+        type=int,
+        default=50,
+    )
+    parser.add_argument(
+        "--dyna",
+        help="compare the wall time and the environment steps to reach a shortest path of Q-learning and Dyna-Q, instead of the suite",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--planning-steps",
+        help="set planning backups per real step of the Dyna-Q runs, comma separated (0 is Q-learning). Default value: 0,5,20",
+        type=str,
+        default="0,5,20",
+    )
+    parser.add_argument(
+        "--scaling",
+        help="print the throughput of the Hogwild training with an increasing number of worker processes, instead of the suite",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--workers",
+        help="set numbers of worker processes of the scaling curve, comma separated. Default value: 1,2,4,8",
+        type=str,
+        default="1,2,4,8",
+    )
+    parser.add_argument(
+        "--episodes",
+        help="set episodes of every worker process of the scaling curve. Default value: 20",
+        type=int,
+        default=20,
+    )
+    parser.add_argument(
+        "--shape",
+        help="set shape of the generated arena of the scaling curve: rows,columns. Default value: 50,50",
+        type=str,
+        default="50,50",
+    )
+    args = parser.parse_args()
+
+    if args.scaling:
+        shape = tuple(int(value) for value in args.shape.split(","))
+        worker_counts = [int(workers) for workers in args.workers.split(",")]
+        scaling(shape, args.episodes, worker_counts)
+    elif args.dyna:
+        planning_steps = [int(n) for n in args.planning_steps.split(",")]
+        sample_efficiency(args.seeds, args.max_episodes, args.every, planning_steps)
+    elif args.dtypes:
+        convergence(args.seeds, args.max_episodes, args.every)
+    else:
+        # the backends must learn the same Q-values before their throughput is measured
+        check_backends()
+        print(f"{len(SUITE)} cases - {args.repeats} repeats - {os.cpu_count()} CPUs")
+        results = run_suite(SUITE, args.repeats)
+        if args.output is not None:
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=2)
+
+        if args.save_baseline:
+            os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+            with open(args.baseline, "w") as f:
+                json.dump(results, f, indent=2)
+            print(f"baseline stored in {args.baseline}")
+        elif not os.path.exists(args.baseline):
+            print(f"no baseline in {args.baseline}, store one with --save-baseline")
+        else:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+            regressions = compare(results, baseline, args.threshold)
+            for regression in regressions:
+                print(f"regression: {regression}")
+            if len(regressions) != 0:
+                sys.exit(1)
+            print("no regression")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+from environment import Environment
+import heapq
+import numpy as np
+
+
+class PrioritizedSweeping:
+    """
+    Model-based planning of the Dyna-Q training: every real step of the Agent is recorded in a model of the environment, then the Q-values are updated with backups simulated from the model.
+
+    Model:
+
+        - the transitions observed by the Agent (state, action) -> (next state, reward), stored in two arrays with shape (state space, action space)
+
+        - the rewards of the environment include the step count of the episode (see Environment.reward): the model records the reward that the pair would get at the first step of an episode, so that the simulated backups do not depend on when the pair was observed
+
+    Prioritized sweeping:
+
+        - the (state, action) pairs are backed up in order of their Bellman error |reward + gamma * max_action(Q(next_state, all_actions)) - Q(state, action)|, kept in a priority queue
+
+        - when a backup changes the Q-values of a state, the pairs that lead to that state (its predecessors) are queued with their new Bellman error, so that the reward of the exit propagates back along the path in a few real steps instead of one episode per step
+
+        - only the pairs with a Bellman error larger than theta are queued
+    """
+
+    def __init__(self, env: Environment, planning_steps: int, alpha: float, gamma: float, theta=1e-3):
+        """
+        PrioritizedSweeping constructor
+
+        Args:
+            env (Environment): the environment
+            planning_steps (int): the backups simulated from the model after every real step
+            alpha (float): learning rate hyperparameter
+            gamma (float): discount factor hyperparameter
+            theta (float): the smallest Bellman error of a queued pair
+
+        Attributes:
+            next_states (np array): the observed next state of every (state, action) pair, -1 if the pair was never observed
+            rewards (np array): the observed reward of every (state, action) pair, without the step count of the episode
+            backups (int): the backups simulated from the model during the last training
+        """
+        self.env = env
+        self.planning_steps = planning_steps
+        self.alpha = alpha
+        self.gamma = gamma
+        self.theta = theta
+        self.next_states = np.full((env.state_space, env.action_space), -1, dtype=np.int64)
+        self.rewards = np.zeros((env.state_space, env.action_space))
+        self.backups = 0
+        # the priority queue of (-Bellman error, state, action) entries, the priority of every queued pair is kept in __priorities: an entry with another priority is stale
+        self.__queue = []
+        self.__priorities = np.zeros((env.state_space, env.action_space))
+        # the number of queued pairs, the queue is rebuilt without the stale entries when they are the most
+        self.__queued = 0
+        # the offsets of the states that can lead to a state: the state itself (a collision) and its neighbours
+        cols = env.shape[1]
+        self.__offsets = np.array([0, -cols, cols, -1, 1])
+
+    def observe(
+        self, q_table, state_index: int, action_index: int, next_state_index: int, reward: float, steps: int
+    ) -> None:
+        """
+        Function that records a real step of the Agent in the model and queues the pairs whose Bellman error it changed. The Q-value of the step must be already updated
+
+        Args:
+            q_table (np array | CompactQTable | LazyQTable): the Q-table of the Agent
+            state_index (int): the state of the step
+            action_index (int): the action of the step
+            next_state_index (int): the next state of the step
+            reward (float): the reward of the step
+            steps (int): the steps of the episode, the step included
+        """
+        self.next_states[state_index, action_index] = next_state_index
+        # the reward of the same step as the first step of an episode
+        self.rewards[state_index, action_index] = reward + steps - 1
+        self.__push(q_table, state_index, action_index)
+        self.__push_predecessors(q_table, state_index)
+
+    def plan(self, q_table) -> None:
+        """
+        Function that executes up to planning_steps backups of the queued pairs, the pair with the largest Bellman error first
+
+        Args:
+            q_table (np array | CompactQTable | LazyQTable): the Q-table of the Agent
+        """
+        backups = 0
+        while backups < self.planning_steps and len(self.__queue) != 0:
+            priority, state_index, action_index = heapq.heappop(self.__queue)
+            if -priority != self.__priorities[state_index, action_index]:
+                # stale entry: the pair was queued again with another priority
+                continue
+            self.__priorities[state_index, action_index] = 0
+            self.__queued -= 1
+
+            # Q-learning backup of the pair, with the transition of the model
+            next_state_index = self.next_states[state_index, action_index]
+            old_value = q_table[state_index, action_index]
+            target = self.rewards[state_index, action_index] + self.gamma * q_table[next_state_index].max()
+            q_table[state_index, action_index] = old_value + self.alpha * (target - old_value)
+            backups += 1
+
+            # the Q-values of state_index changed, so the Bellman errors of its predecessors changed too
+            self.__push_predecessors(q_table, state_index)
+
+        self.backups += backups
+
+        if len(self.__queue) > 4 * self.__queued + 1024:
+            # the queue is rebuilt from the priorities of the queued pairs
+            states, actions = np.nonzero(self.__priorities)
+            self.__queue = list(zip((-self.__priorities[states, actions]).tolist(), states.tolist(), actions.tolist()))
+            heapq.heapify(self.__queue)
+
+    def __push(self, q_table, state_index: int, action_index: int) -> None:
+        """
+        Function that queues a pair of the model if its Bellman error is larger than theta
+
+        Args:
+            q_table (np array | CompactQTable | LazyQTable): the Q-table of the Agent
+            state_index (int): the state of the pair
+            action_index (int): the action of the pair
+        """
+        next_state_index = self.next_states[state_index, action_index]
+        error = abs(
+            self.rewards[state_index, action_index]
+            + self.gamma * q_table[next_state_index].max()
+            - q_table[state_index, action_index]
+        )
+        self.__queue_pairs([state_index], [action_index], [error])
+
+    def __push_predecessors(self, q_table, state_index: int) -> None:
+        """
+        Function that queues the observed pairs that lead to a state if their Bellman error is larger than theta
+
+        Args:
+            q_table (np array | CompactQTable | LazyQTable): the Q-table of the Agent
+            state_index (int): the state
+        """
+        # the candidate predecessors, the model keeps only the pairs that really lead to state_index
+        candidates = np.clip(state_index + self.__offsets, 0, self.env.state_space - 1)
+        states, actions = np.nonzero(self.next_states[candidates] == state_index)
+        if states.size == 0:
+            return
+
+        # the Bellman errors of all the predecessors at once, they share the next state
+        states = candidates[states]
+        errors = np.abs(
+            self.rewards[states, actions] + self.gamma * q_table[state_index].max() - q_table[states, actions]
+        )
+        self.__queue_pairs(states.tolist(), actions.tolist(), errors.tolist())
+
+    def __queue_pairs(self, states: list, actions: list, errors: list) -> None:
+        """
+        Function that queues the pairs with a Bellman error larger than theta. A pair already queued with a larger error is not queued again
+
+        Args:
+            states (list): the states of the pairs
+            actions (list): the actions of the pairs
+            errors (list): the Bellman errors of the pairs
+        """
+        for state_index, action_index, error in zip(states, actions, errors):
+            if error > self.theta and error > self.__priorities[state_index, action_index]:
+                self.__queued += self.__priorities[state_index, action_index] == 0
+                self.__priorities[state_index, action_index] = error
+                heapq.heappush(self.__queue, (-error, state_index, action_index))
@@ -0,0 +1,63 @@
+import numpy as np
+
+
+class StateEncoding:
+    """
+    State encoding of an arena: every (x, y) position of the arena is a state, identified by its row-major index x * cols + y. It is shared by the Environment and the Agent, so that the state indexes of the environment are always the rows of the Q-table
+    """
+
+    def __init__(self, shape: tuple):
+        """
+        StateEncoding constructor
+
+        Args:
+            shape (tuple): the (x: int, y: int) shape of the arena
+
+        Attributes:
+            shape (tuple): the (x: int, y: int) shape of the arena
+            size (int): number of all possible states
+        """
+        rows, cols = shape
+        self.shape = (rows, cols)
+        self.size = rows * cols
+
+    def encode(self, x, y):
+        """
+        Function that returns the state index of a position. It works on ints and on NumPy arrays of coordinates
+
+        Args:
+            x (int | np array): the x coordinate of the position in the arena
+            y (int | np array): the y coordinate of the position in the arena
+
+        Returns:
+            int | np array: the state index of the position
+        """
+        return x * self.shape[1] + y
+
+    def decode(self, index):
+        """
+        Function that returns the position of a state index. It works on ints and on NumPy arrays of state indexes
+
+        Args:
+            index (int | np array): the state index
+
+        Returns:
+            tuple: the (x, y) position of the state in the arena
+        """
+        if isinstance(index, np.ndarray):
+            return np.divmod(index, self.shape[1])
+        return divmod(index, self.shape[1])
+
+    def contains(self, x: int, y: int) -> bool:
+        """
+        Function that checks if a position is inside the arena bounds
+
+        Args:
+            x (int): the x coordinate of the position
+            y (int): the y coordinate of the position
+
+        Returns:
+            bool: True if (x, y) is inside the arena
+        """
+        rows, cols = self.shape
+        return 0 <= x < rows and 0 <= y < cols
@@ -1,7 +1,14 @@
 from moves import Move
-from copy import deepcopy
-from colorama import Back, Style
-import random
+from encoding import StateEncoding
+from copy import copy
+import generator
+import hashlib
+import mazefile
+import numpy as np
+import tiles
+
+# the states of every block of the transition table build
+TRANSITIONS_BLOCK = 2**20
 
 
 class Environment:
@@ -17,11 +24,14 @@ class Environment:
             shape (tuple): the (x: int, y: int) shape of the arena
 
         Attributes:
-            arena (Environment): the environment that the Agent will explore
+            arena (np array): the read-only arena that the Agent will explore with one byte per tile, shared by all the copies of the environment
             shape (tuple): the (x: int, y: int) shape of the arena
             agent_pos (tuple): the (x, y) position of the Agent in the arena
             exit_pos (tuple): the (x, y) position of the Exit in the arena
-            step (int): the total steps of the Agent in the arena
+            encoding (StateEncoding): the encoding of the Agent positions as state indexes
+            state_index (int): the index of the current state (the Agent position) in the state space
+            transitions (np array): the transition table with shape (state space, action space), it maps (state, action) -> next state. It is built the first time it is used
+            steps (int): the total steps of the Agent in the arena
             collision (bool): set to True if a collision occurred
             done (bool): set to True if Agent reaches the exit
             last_action (Move): set to the last action performed by the Agent
@@ -42,94 +52,196 @@ class Environment:
 
         # the shape of the arena
         rows, cols = self.shape
-        # the possible states are all possible agent positions in the arena grid
+        # the possible states are all possible agent positions in the arena grid. The arena is never modified: the Agent is only tracked by its position
         self.arena = self.__generated_arena
         # agent starting position is always the same
-        self.agent_pos = (rows - 1, 0)
+        self.start_pos = (rows - 1, 0)
         # exit position is always the same
         self.exit_pos = (0, cols - 1)
-        # total steps of the agent
-        self.step = 0
-        # set to True if a collision occurred: there is a collision if the agent choose to move to a tile where there is an obstacle or if the agent choose to move out of the arena bounds
-        self.collision = False
-        # set to True if the agent reaches the exit
-        self.done = False
-        # set to the last action performed by the agent
-        self.last_action = None
 
         # all possible actions
         self.actions = [Move.UP, Move.DOWN, Move.LEFT, Move.RIGHT]
 
         # RL variables
+        # every agent position is a state, identified by its index in the state space
+        self.encoding = StateEncoding(self.shape)
         # state space = all possible states = row x col
-        self.state_space = rows * cols
+        self.state_space = self.encoding.size
         # action space = all possible actions = up, down, left, right = 4
         self.action_space = 4
+        # the state index of the agent starting position
+        self.start_index = self.encoding.encode(*self.start_pos)
+        # the state index of the exit position
+        self.exit_index = self.encoding.encode(*self.exit_pos)
+        # transition table: the next state of every (state, action) pair, built the first time it is used so that loading a large arena does not depend on it
+        self.__transitions = None
+
+        self.reset()
 
-    def generate_arena(self, obstacle_prob=0.2) -> None:
+    @property
+    def transitions(self) -> np.ndarray:
+        """
+        The transition table of the arena with shape (state space, action space)
         """
-        Function that generates a random arena. The Agent and the Exit are always at the same position but the obstacles are generated randomly
+        if self.__transitions is None:
+            self.__transitions = self.__build_transitions()
+        return self.__transitions
 
-        Args:
-            obstacle_prob (float): the probability [0, 1] of the generation of an obstacle
+    def __build_transitions(self) -> np.ndarray:
         """
-        self.__generated_arena = []
-        rows, cols = self.shape
+        Function that precomputes the transition table of the arena. A move that collides with an obstacle or with the arena bounds leaves the Agent in the same state
 
-        # first row
-        self.__generated_arena.append(
-            [
-                random.choices([0, 3], [1 - obstacle_prob, obstacle_prob])[0]
-                for i in range(0, cols - 1)
-            ]
-            + [2],
+        Returns:
+            np array: the transition table with shape (state space, action space)
+        """
+        rows, cols = self.shape
+        # the tiles of the arena by state index
+        tiles = self.arena.reshape(-1)
+        # 4 bytes per state index while they fit
+        transitions = np.empty(
+            (self.state_space, self.action_space), dtype=np.int32 if self.state_space < 2**31 else np.int64
         )
 
-        # middle rows
-        for _ in range(1, rows - 1):
-            self.__generated_arena.append(
-                [
-                    random.choices([0, 3], [1 - obstacle_prob, obstacle_prob])[0]
-                    for i in range(0, cols)
-                ],
-            )
-
-        # last row
-        self.__generated_arena.append(
-            [1]
-            + [
-                random.choices([0, 3], [1 - obstacle_prob, obstacle_prob])[0]
-                for i in range(0, cols - 1)
-            ],
-        )
+        # the table is built one block of states at a time, so that the temporary arrays do not grow with the arena
+        for start in range(0, self.state_space, TRANSITIONS_BLOCK):
+            states = np.arange(start, min(start + TRANSITIONS_BLOCK, self.state_space))
+            # the (x, y) coordinates of the states of the block
+            x, y = self.encoding.decode(states)
+
+            # the (x, y) offset of every action, in the same order of self.actions
+            for action_index, (dx, dy) in enumerate([(-1, 0), (1, 0), (0, -1), (0, 1)]):
+                next_x = x + dx
+                next_y = y + dy
+                # the next position is valid if it is inside the arena bounds and it is not an obstacle
+                valid = (next_x >= 0) & (next_x < rows) & (next_y >= 0) & (next_y < cols)
+                next_index = np.where(valid, self.encoding.encode(next_x, next_y), 0)
+                valid &= tiles[next_index] != 3
+                transitions[start : start + states.size, action_index] = np.where(valid, next_index, states)
+
+        return transitions
+
+    def generate_arena(self, obstacle_prob=0.2, seed=None, solvable=True) -> None:
+        """
+        Function that generates a random arena. The Agent and the Exit are always at the same position but the obstacles are generated randomly, with a single draw for the whole arena
 
-        self.reset()
+        Args:
+            obstacle_prob (float): the probability [0, 1] of the generation of an obstacle
+            seed (int | None): the seed of the generation, by default it is drawn from the random module
+            solvable (bool): regenerate the arena until the Exit can be reached from the Agent starting position
+        """
+        self.__generated_arena = generator.generate_arena(
+            self.shape, obstacle_prob=obstacle_prob, seed=seed, solvable=solvable
+        )
+        self.init()
 
     def load_default(self) -> None:
         """
         Function that load the default arena (10 x 10)
         """
         self.shape = (10, 10)
-        self.__generated_arena = [
-            [0, 0, 0, 0, 0, 0, 0, 0, 0, 2],
-            [0, 0, 3, 3, 0, 3, 0, 0, 3, 3],
-            [0, 0, 3, 3, 0, 3, 0, 3, 0, 0],
-            [0, 0, 0, 0, 0, 3, 0, 0, 3, 0],
-            [3, 3, 3, 3, 0, 0, 0, 0, 3, 0],
-            [0, 0, 0, 0, 0, 0, 3, 0, 3, 0],
-            [0, 3, 3, 0, 0, 0, 3, 0, 3, 0],
-            [0, 0, 0, 0, 0, 3, 3, 0, 0, 0],
-            [0, 0, 0, 3, 0, 0, 0, 0, 0, 0],
-            [1, 0, 0, 3, 0, 0, 0, 0, 0, 0],
-        ]
-        self.reset()
+        self.__generated_arena = np.array(
+            [
+                [0, 0, 0, 0, 0, 0, 0, 0, 0, 2],
+                [0, 0, 3, 3, 0, 3, 0, 0, 3, 3],
+                [0, 0, 3, 3, 0, 3, 0, 3, 0, 0],
+                [0, 0, 0, 0, 0, 3, 0, 0, 3, 0],
+                [3, 3, 3, 3, 0, 0, 0, 0, 3, 0],
+                [0, 0, 0, 0, 0, 0, 3, 0, 3, 0],
+                [0, 3, 3, 0, 0, 0, 3, 0, 3, 0],
+                [0, 0, 0, 0, 0, 3, 3, 0, 0, 0],
+                [0, 0, 0, 3, 0, 0, 0, 0, 0, 0],
+                [1, 0, 0, 3, 0, 0, 0, 0, 0, 0],
+            ],
+            dtype=np.uint8,
+        )
+        self.init()
 
-    def reset(self) -> None:
+    def load_arena(self, arena) -> None:
         """
-        Function that resets the environment
+        Function that loads an arena, its shape becomes the shape of the environment. A uint8 array (e.g. a memory-mapped file) is used without copying it
+
+        Args:
+            arena (list | np array): the arena grid, one int per tile (0: empty, 1: the Agent, 2: the Exit, 3: an obstacle)
         """
+        arena = np.asarray(arena)
+        if arena.ndim != 2 or arena.size == 0 or arena.dtype.kind not in "iu" or arena.min() < 0 or arena.max() > 3:
+            raise RuntimeError("An arena must be a grid of tiles 0, 1, 2 or 3")
+
+        self.shape = arena.shape
+        self.__generated_arena = arena if arena.dtype == np.uint8 else arena.astype(np.uint8)
         self.init()
 
+    def load_file(self, path: str, mmap=True) -> None:
+        """
+        Function that loads an arena saved with save_file (see mazefile for the formats)
+
+        Args:
+            path (str): the maze file of the arena: .txt (one character per tile), .mzb (bit-packed obstacle mask) or .npy (one byte per tile)
+            mmap (bool): memory-map the binary files instead of reading them
+        """
+        self.load_arena(mazefile.load(path, mmap=mmap))
+
+    def save_file(self, path: str) -> None:
+        """
+        Function that saves the arena to a maze file, its format is chosen by the extension (see mazefile)
+
+        Args:
+            path (str): the maze file of the arena: .txt (one character per tile), .mzb (bit-packed obstacle mask) or .npy (one byte per tile)
+        """
+        mazefile.save(path, self.arena_array())
+
+    def arena_array(self) -> np.ndarray:
+        """
+        Function that returns the arena as a NumPy array with one byte per tile
+
+        Returns:
+            np array: the arena grid with shape (rows, cols)
+        """
+        # raise an exception if the arena is not set
+        if self.__generated_arena is None:
+            raise RuntimeError("Load or generate an arena first")
+
+        return self.__generated_arena
+
+    def arena_hash(self) -> str:
+        """
+        Function that returns a content hash of the arena: two arenas have the same hash only if they have the same shape and the same tiles
+
+        Returns:
+            str: the SHA-256 hex digest of the arena
+        """
+        arena = self.arena_array()
+        digest = hashlib.sha256()
+        digest.update(np.array(arena.shape, dtype=np.int64).tobytes())
+        digest.update(arena.tobytes())
+        return digest.hexdigest()
+
+    def reset(self) -> None:
+        """
+        Function that resets the environment: the Agent goes back to its starting position
+        """
+        # raise an exception if the arena is not set
+        if self.__generated_arena is None:
+            raise RuntimeError("Load or generate an arena first")
+
+        # the state index of the agent position
+        self.state_index = self.start_index
+        # total steps of the agent
+        self.steps = 0
+        # set to True if a collision occurred: there is a collision if the agent choose to move to a tile where there is an obstacle or if the agent choose to move out of the arena bounds
+        self.collision = False
+        # set to True if the agent reaches the exit
+        self.done = False
+        # set to the last action performed by the agent
+        self.last_action = None
+
+    @property
+    def agent_pos(self) -> tuple:
+        """
+        The (x, y) position of the Agent in the arena
+        """
+        return self.encoding.decode(self.state_index)
+
     def set_agent(self, x: int, y: int) -> None:
         """
         Function that move the Agent to the new position
@@ -138,7 +250,7 @@ class Environment:
             x (int): the x coordinate of the new position in the arena
             y (int): the y coordinate of the new position in the arena
         """
-        self.step += 1
+        self.steps += 1
 
         if self.__is_collision(x, y):
             self.collision = True
@@ -146,20 +258,58 @@ class Environment:
         else:
             self.collision = False
 
-        self.arena[x][y] = 1
-
-        prev_x, prev_y = self.agent_pos
-        self.arena[prev_x][prev_y] = 0
-
-        self.agent_pos = (x, y)
+        self.state_index = self.encoding.encode(x, y)
 
         if self.agent_pos == self.exit_pos:
             self.done = True
 
+    def step(self, action_index: int) -> tuple:
+        """
+        Function that executes an Agent action in place: only the Agent position, the step count and the collision flag change
+
+        Args:
+            action_index (int): the index of the action in the action space
+
+        Returns:
+            tuple: (next state index, reward, done)
+        """
+        # item() reads a single element of the transition table as a Python int, without a copy of the table
+        next_state_index = self.transitions.item(self.state_index, action_index)
+
+        self.steps += 1
+        self.last_action = self.actions[action_index]
+        # the transition table leaves the Agent in the same state if the move collides
+        self.collision = next_state_index == self.state_index
+        self.state_index = next_state_index
+        self.done = next_state_index == self.exit_index
+
+        return (next_state_index, self.reward(), self.done)
+
+    def step_many(self, state_indexes: np.ndarray, action_indexes: np.ndarray, steps: np.ndarray) -> tuple:
+        """
+        Function that executes an action in many independent copies of the environment at once. The environment itself is not modified
+
+        Args:
+            state_indexes (np array): the current state index of every copy
+            action_indexes (np array): the index of the action executed in every copy
+            steps (np array): the total steps of the Agent in every copy, the executed action included
+
+        Returns:
+            tuple: (next state indexes, rewards, done) arrays
+        """
+        next_state_indexes = self.transitions[state_indexes, action_indexes]
+        collision = next_state_indexes == state_indexes
+        done = next_state_indexes == self.exit_index
+
+        # the same rewards of the reward function, computed for every copy
+        rewards = -steps - 100 * collision + 10000 * done
+
+        return (next_state_indexes, rewards, done)
+
     # execute(current_state, action) = next_state, reward
     def move_agent(self, move: Move) -> tuple:
         """
-        Function that executes an Agent move in the current state. It returns the next state and the reward of the next state
+        Function that executes an Agent move in a copy of the current state. The copy shares the arena and the transition table with the current state. It returns the next state and the reward of the next state
 
         Args:
             move (Move): the move of the Agent
@@ -167,22 +317,15 @@ class Environment:
         Returns:
             tuple: (next state, reward) pair
         """
-        next_state = deepcopy(self)
-        next_state.last_action = move
-        x, y = next_state.agent_pos
-
-        if move == Move.UP:
-            next_state.set_agent(x - 1, y)
-        elif move == Move.DOWN:
-            next_state.set_agent(x + 1, y)
-        elif move == Move.LEFT:
-            next_state.set_agent(x, y - 1)
-        elif move == Move.RIGHT:
-            next_state.set_agent(x, y + 1)
-        else:
+        if move not in self.actions:
             raise RuntimeError("Illegal move")
 
-        return (next_state, next_state.reward())
+        # the transition table is built before the copy, so that the copy shares it
+        self.transitions
+        next_state = copy(self)
+        _, reward, _ = next_state.step(self.actions.index(move))
+
+        return (next_state, reward)
 
     def reward(self):
         """
@@ -193,7 +336,7 @@ class Environment:
             -1: for each step
             +10000: if the Agent reached the exit
         """
-        reward = -self.step
+        reward = -self.steps
 
         if self.collision:
             reward -= 100
@@ -214,37 +357,8 @@ class Environment:
         Returns:
             bool: True if (x, y) is occupied by an obstacle or is an out of bounds position of the arena
         """
-        rows, cols = self.shape
-        return (
-            x < 0 or x > (rows - 1) or y < 0 or y > (cols - 1) or self.arena[x][y] == 3
-        )
-
-    def __get_colored_tile(self, x: int, y: int) -> str:
-        """
-        Function that returns the colored tile according to its content
-
-        Tile contents:
-            1: the Agent     -> blue
-            2: the Exit      -> green
-            3: the obstacles -> red
-            0: empty         -> white
-        """
-        if self.arena[x][y] == 1:
-            return f"{Back.BLUE}  "
-        elif self.arena[x][y] == 2:
-            return f"{Back.GREEN}  "
-        elif self.arena[x][y] == 3:
-            return f"{Back.RED}  "
-        else:
-            return f"{Back.WHITE}  "
+        return not self.encoding.contains(x, y) or self.arena[x, y] == 3
 
     def __str__(self) -> str:
-        rows, cols = self.shape
-        arena = ""
-        for i in range(0, rows):
-            for j in range(0, cols):
-                if j == (cols - 1):
-                    arena += self.__get_colored_tile(i, j) + f"{Style.RESET_ALL}" + "\n"
-                else:
-                    arena += self.__get_colored_tile(i, j) + f"{Style.RESET_ALL}"
-        return arena
+        # the same colored tiles of the Renderer
+        return tiles.frame(self.arena, self.agent_pos)
@@ -0,0 +1,220 @@
+from environment import Environment
+import argparse
+import generator
+import json
+import numpy as np
+import policy
+import sys
+import time
+
+# the cells of the coverage map
+OBSTACLE = -2
+UNSOLVABLE = -1
+OPTIMAL = 0
+SUBOPTIMAL = 1
+LOOP = 2
+COLLISION = 3
+
+# the characters of the coverage map cells, the Exit is 'E'
+MAP_CHARS = {OBSTACLE: "#", UNSOLVABLE: " ", OPTIMAL: ".", SUBOPTIMAL: "o", LOOP: "L", COLLISION: "X"}
+
+
+def greedy_policy(q_table) -> np.ndarray:
+    """
+    Function that extracts the greedy policy of a Q-table: the action with the largest Q-value of every state (the first one on ties, like Agent.exec)
+
+    Args:
+        q_table (np array | CompactQTable | LazyQTable): the Q-table with shape (state space, action space)
+
+    Returns:
+        np array: the action index of every state
+    """
+    return np.argmax(np.asarray(q_table), axis=1)
+
+
+def path_lengths(successors: np.ndarray, exit_index: int) -> tuple:
+    """
+    Function that computes, for every state, the steps needed to reach the exit following the successors of a deterministic policy. All the rollouts advance together by pointer doubling:
+    after round k, successor_k is the state reached after 2^k steps and length is min(steps to the exit, 2^k), so that log2(state space) rounds of NumPy index arithmetic cover every path
+
+    Args:
+        successors (np array): the next state of every state under the policy
+        exit_index (int): the state index of the exit, it is absorbing
+
+    Returns:
+        tuple: (lengths, ends) pair: the steps to reach the exit of every state, -1 if the rollout never reaches it (a loop or a collision), and the state reached after at least state space steps, on the cycle where the rollout ends
+    """
+    successor = successors.copy()
+    successor[exit_index] = exit_index
+    states = successor.size
+    # round 0: min(steps to the exit, 1)
+    length = np.ones(states, dtype=np.int64)
+    length[exit_index] = 0
+
+    jump = 1
+    # a path to the exit visits every state at most once, so it is not longer than the state space
+    while jump < states:
+        # the rollouts that did not reach the exit within jump steps continue from the state reached after jump steps
+        running = length == jump
+        length[running] = jump + length[successor[running]]
+        successor = successor[successor]
+        jump *= 2
+
+    length[length == jump] = -1
+    return (length, successor)
+
+
+def evaluate(env: Environment, q_table) -> dict:
+    """
+    Function that evaluates the greedy policy of a Q-table from every free cell of the arena at once. The path length of every rollout is compared with the shortest distance to the exit (BFS over the arena)
+
+    Args:
+        env (Environment): the environment
+        q_table (np array | CompactQTable | LazyQTable): the Q-table with shape (state space, action space)
+
+    Returns:
+        dict: the report of the policy:
+            cells: the free cells connected to the exit (the exit excluded)
+            reached: the cells whose rollout reaches the exit
+            optimal: the cells whose rollout follows a shortest path
+            loops: the cells whose rollout ends in a cycle of two or more states
+            collisions: the cells whose rollout ends in a state where the greedy action collides
+            coverage: reached / cells
+            optimality: the mean of shortest distance / path length of the reached cells (1 if every reached cell follows a shortest path)
+            start: the path length from the Agent starting position, -1 if it does not reach the exit
+            time: the wall time of the evaluation in seconds
+            coverage_map: the cell of every tile (OBSTACLE, UNSOLVABLE, OPTIMAL, SUBOPTIMAL, LOOP or COLLISION)
+            lengths: the path length of every tile, -1 if the exit is not reached
+            distances: the shortest distance to the exit of every tile, -1 if there is no path
+    """
+    start = time.perf_counter()
+    states = np.arange(env.state_space)
+
+    # the greedy successor of every state: a collision leaves the Agent in the same state
+    successors = env.transitions[states, greedy_policy(q_table)].astype(np.int64)
+    lengths, ends = path_lengths(successors, env.exit_index)
+
+    # the moves are reversible, so a BFS from the exit gives the shortest distance of every cell to the exit
+    distances = generator.distances(env.arena, env.exit_pos).reshape(-1)
+    obstacles = env.arena.reshape(-1) == 3
+    cells = (distances > 0) & ~obstacles
+
+    # the rollouts that never reach the exit end in a cycle, a cycle of one state is a greedy action that collides
+    stuck = successors[ends] == ends
+
+    coverage_map = np.full(env.state_space, UNSOLVABLE, dtype=np.int8)
+    coverage_map[obstacles] = OBSTACLE
+    reached = cells & (lengths != -1)
+    coverage_map[reached] = np.where(lengths[reached] == distances[reached], OPTIMAL, SUBOPTIMAL)
+    coverage_map[cells & (lengths == -1) & stuck] = COLLISION
+    coverage_map[cells & (lengths == -1) & ~stuck] = LOOP
+    coverage_map[env.exit_index] = OPTIMAL
+
+    total = int(cells.sum())
+    ratios = distances[reached] / lengths[reached]
+    return {
+        "cells": total,
+        "reached": int(reached.sum()),
+        "optimal": int((coverage_map[cells] == OPTIMAL).sum()),
+        "loops": int((coverage_map[cells] == LOOP).sum()),
+        "collisions": int((coverage_map[cells] == COLLISION).sum()),
+        "coverage": float(reached.sum() / total) if total != 0 else 1.0,
+        "optimality": float(ratios.mean()) if ratios.size != 0 else 0.0,
+        "start": int(lengths[env.start_index]),
+        "time": round(time.perf_counter() - start, 4),
+        "coverage_map": coverage_map.reshape(env.shape),
+        "lengths": lengths.reshape(env.shape),
+        "distances": distances.reshape(env.shape),
+    }
+
+
+def summary(report: dict) -> str:
+    """
+    Function that returns the summary lines of a report
+
+    Args:
+        report (dict): the report returned by evaluate
+
+    Returns:
+        str: the summary
+    """
+    return "\n".join(
+        [
+            f"cells: {report['cells']} - reached: {report['reached']} - optimal: {report['optimal']} - loops: {report['loops']} - collisions: {report['collisions']}",
+            f"coverage: {report['coverage']:.4f} - optimality: {report['optimality']:.4f} - start: {report['start']} steps",
+            f"evaluated in {report['time']:.2f}s",
+        ]
+    )
+
+
+def coverage_text(report: dict) -> str:
+    """
+    Function that returns the coverage map as text, one character per tile (see MAP_CHARS)
+
+    Args:
+        report (dict): the report returned by evaluate
+
+    Returns:
+        str: the coverage map, a line per row
+    """
+    coverage_map = report["coverage_map"]
+    lines = ["".join(MAP_CHARS[cell] for cell in row.tolist()) for row in coverage_map]
+    # the exit is in the top right corner
+    lines[0] = lines[0][:-1] + "E"
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Evaluate the greedy policy of a policy file from every free cell of its arena")
+    parser.add_argument("policy", help="set policy file (.npz) to evaluate", type=str)
+    parser.add_argument(
+        "--arena-file", help="set maze file of the arena. Default value: the arena of the policy file", type=str, default=None
+    )
+    parser.add_argument(
+        "--min-coverage",
+        help="set smallest coverage of a passing policy, the exit code is 1 below it: [0, 1]. Default value: 0",
+        type=float,
+        default=0.0,
+    )
+    parser.add_argument(
+        "--min-optimality",
+        help="set smallest optimality of a passing policy, the exit code is 1 below it: [0, 1]. Default value: 0",
+        type=float,
+        default=0.0,
+    )
+    parser.add_argument(
+        "--coverage-map", help="set .npy file where the coverage map is saved. Default value: not saved", type=str, default=None
+    )
+    parser.add_argument("--show-map", help="print the coverage map, one character per tile", action="store_true")
+    parser.add_argument(
+        "--output", help="set JSON file where the report is written. Default value: not written", type=str, default=None
+    )
+    args = parser.parse_args()
+
+    loaded = policy.load(args.policy)
+    env = Environment()
+    if args.arena_file is not None:
+        env.load_file(args.arena_file)
+    else:
+        env.load_arena(loaded["arena"])
+    if env.arena_hash() != loaded["arena_hash"]:
+        raise RuntimeError(f"'{args.policy}' is the policy of another arena")
+
+    report = evaluate(env, loaded["q_table"])
+    if args.show_map:
+        print(coverage_text(report), end="")
+    print(summary(report))
+
+    if args.coverage_map is not None:
+        np.save(args.coverage_map, report["coverage_map"])
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump({key: value for key, value in report.items() if not isinstance(value, np.ndarray)}, f, indent=2)
+
+    if report["coverage"] < args.min_coverage or report["optimality"] < args.min_optimality:
+        print(f"policy below --min-coverage {args.min_coverage} or --min-optimality {args.min_optimality}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import argparse
+import mazefile
+import numpy as np
+import os
+import random
+import time
+
+
+def sample_arena(shape: tuple, obstacle_prob: float, rng: np.random.Generator) -> np.ndarray:
+    """
+    Function that samples a random arena with a single NumPy draw for the whole obstacle mask. The Agent is always at the bottom left corner and the Exit at the top right corner
+
+    Args:
+        shape (tuple): the (x: int, y: int) shape of the arena
+        obstacle_prob (float): the probability [0, 1] of the generation of an obstacle
+        rng (np random Generator): the generator of the draw
+
+    Returns:
+        np array: the arena grid with one byte per tile (0: empty, 1: the Agent, 2: the Exit, 3: an obstacle)
+    """
+    rows, cols = shape
+    arena = np.where(rng.random((rows, cols)) < obstacle_prob, 3, 0).astype(np.uint8)
+    arena[rows - 1, 0] = 1
+    arena[0, cols - 1] = 2
+    return arena
+
+
+def distances(arena: np.ndarray, source: tuple, target=None) -> np.ndarray:
+    """
+    Function that computes the distance of every tile from a source tile with a BFS over the grid: the moves are up, down, left and right and the obstacles cannot be crossed. Every BFS level is expanded with one NumPy operation
+
+    Args:
+        arena (np array): the arena grid
+        source (tuple): the (x, y) position where the BFS starts
+        target (tuple | None): the (x, y) position where the BFS stops, by default every tile connected to the source is visited
+
+    Returns:
+        np array: the distances with shape (rows, cols), -1 for the tiles that are not reached
+    """
+    rows, cols = arena.shape
+    free = (np.asarray(arena) != 3).reshape(-1)
+    distance = np.full(rows * cols, -1, dtype=np.int64)
+    target_index = target[0] * cols + target[1] if target is not None else None
+
+    frontier = np.array([source[0] * cols + source[1]], dtype=np.int64)
+    distance[frontier] = 0
+    level = 0
+    while frontier.size != 0 and (target_index is None or distance[target_index] == -1):
+        level += 1
+        x, y = np.divmod(frontier, cols)
+        # the neighbours of the frontier inside the arena bounds: up, down, left, right
+        neighbours = np.concatenate(
+            (
+                frontier[x > 0] - cols,
+                frontier[x < rows - 1] + cols,
+                frontier[y > 0] - 1,
+                frontier[y < cols - 1] + 1,
+            )
+        )
+        neighbours = neighbours[free[neighbours] & (distance[neighbours] == -1)]
+        frontier = np.unique(neighbours)
+        distance[frontier] = level
+
+    return distance.reshape(rows, cols)
+
+
+def reachable(arena: np.ndarray, source: tuple) -> np.ndarray:
+    """
+    Function that finds the tiles connected to a source tile with the same BFS of distances, keeping a boolean mask instead of the distances: one byte per tile instead of eight
+
+    Args:
+        arena (np array): the arena grid
+        source (tuple): the (x, y) position where the BFS starts
+
+    Returns:
+        np array: the mask with shape (rows, cols), True for the tiles connected to the source
+    """
+    rows, cols = arena.shape
+    free = (np.asarray(arena) != 3).reshape(-1)
+    visited = np.zeros(rows * cols, dtype=bool)
+
+    frontier = np.array([source[0] * cols + source[1]], dtype=np.int64)
+    visited[frontier] = True
+    while frontier.size != 0:
+        x, y = np.divmod(frontier, cols)
+        # the neighbours of the frontier inside the arena bounds: up, down, left, right
+        neighbours = np.concatenate(
+            (
+                frontier[x > 0] - cols,
+                frontier[x < rows - 1] + cols,
+                frontier[y > 0] - 1,
+                frontier[y < cols - 1] + 1,
+            )
+        )
+        neighbours = neighbours[free[neighbours] & ~visited[neighbours]]
+        frontier = np.unique(neighbours)
+        visited[frontier] = True
+
+    return visited.reshape(rows, cols)
+
+
+def is_solvable(arena: np.ndarray) -> bool:
+    """
+    Function that checks if the Exit can be reached from the Agent starting position
+
+    Args:
+        arena (np array): the arena grid
+
+    Returns:
+        bool: True if the Exit can be reached
+    """
+    rows, cols = arena.shape
+    start_pos, exit_pos = (rows - 1, 0), (0, cols - 1)
+    return bool(distances(arena, start_pos, target=exit_pos)[exit_pos] != -1)
+
+
+def generate_arena(shape: tuple, obstacle_prob=0.2, seed=None, solvable=True, max_attempts=1000) -> np.ndarray:
+    """
+    Function that generates a random arena, regenerating it until the Exit can be reached from the Agent starting position
+
+    Args:
+        shape (tuple): the (x: int, y: int) shape of the arena
+        obstacle_prob (float): the probability [0, 1] of the generation of an obstacle
+        seed (int | np random Generator | None): the seed of the generation, by default it is drawn from the random module (so that random.seed makes the generation reproducible)
+        solvable (bool): regenerate the arena until the Exit can be reached
+        max_attempts (int): the maximum number of generated arenas
+
+    Returns:
+        np array: the arena grid with one byte per tile
+    """
+    if obstacle_prob < 0 or obstacle_prob > 1:
+        raise RuntimeError("The obstacle probability must be in range [0, 1]")
+
+    rng = np.random.default_rng(seed if seed is not None else random.getrandbits(64))
+    for _ in range(0, max_attempts):
+        arena = sample_arena(shape, obstacle_prob, rng)
+        if not solvable or is_solvable(arena):
+            return arena
+
+    raise RuntimeError(
+        f"No arena with a reachable Exit in {max_attempts} attempts, lower the obstacle probability ({obstacle_prob})"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a batch of seeded arenas where the Exit can be reached")
+    parser.add_argument("--count", help="set number of arenas. Default value: 1000", type=int, default=1000)
+    parser.add_argument("--shape", help="set arena shape: rows,columns. Default value: 100,100", type=str, default="100,100")
+    parser.add_argument(
+        "--obstacle-prob", help="set probability of an obstacle: [0, 1]. Default value: 0.2", type=float, default=0.2
+    )
+    parser.add_argument("--seed", help="set seed of the batch. Default value: 0", type=int, default=0)
+    parser.add_argument(
+        "--output",
+        help="set directory where the arenas are saved. Default value: arenas",
+        type=str,
+        default="arenas",
+    )
+    parser.add_argument(
+        "--format",
+        help="set maze file format of the arenas: txt (one character per tile), mzb (bit-packed obstacle mask) or npy (one byte per tile). Default value: npy",
+        choices=["txt", "mzb", "npy"],
+        default="npy",
+    )
+    args = parser.parse_args()
+
+    shape = tuple(int(value) for value in args.shape.split(","))
+    os.makedirs(args.output, exist_ok=True)
+
+    # a single generator for the whole batch: the same seed produces the same arenas
+    rng = np.random.default_rng(args.seed)
+    start = time.perf_counter()
+    for i in range(0, args.count):
+        arena = generate_arena(shape, obstacle_prob=args.obstacle_prob, seed=rng)
+        mazefile.save(os.path.join(args.output, f"arena_{i:05d}.{args.format}"), arena)
+        print(f"generated: {i + 1}/{args.count}", end="\r")
+    print("")
+    print(f"{args.count} arenas {shape[0]}x{shape[1]} generated in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+from environment import Environment
+from agent import Agent
+from multiprocessing import shared_memory
+import contextlib
+import io
+import multiprocessing as mp
+import numpy as np
+import random
+import time
+
+# the environment and the shared Q-table of the worker process, attached once by init_worker
+worker_env = None
+worker_memory = None
+worker_q_table = None
+
+
+def worker_epsilons(epsilon: float, workers: int) -> list:
+    """
+    Function that returns the epsilon of every worker: from epsilon (the first worker) down to epsilon^3 (the last worker), so that some workers explore and others follow the shared Q-table
+
+    Args:
+        epsilon (float): the epsilon of the first worker
+        workers (int): the number of workers
+
+    Returns:
+        list: the epsilon of every worker
+    """
+    if workers == 1:
+        return [epsilon]
+    return [round(epsilon ** (1 + 2 * i / (workers - 1)), 4) for i in range(0, workers)]
+
+
+def init_worker(arena: np.ndarray, name: str, shape: tuple, dtype: str) -> None:
+    """
+    Function that initializes a worker process: its environment is built once from the arena and the shared Q-table is attached once
+
+    Args:
+        arena (np array): the arena grid
+        name (str): the name of the shared memory block of the Q-table
+        shape (tuple): the shape of the Q-table
+        dtype (str): the type of the Q-values
+    """
+    global worker_env, worker_memory, worker_q_table
+    worker_env = Environment()
+    worker_env.load_arena(arena)
+    worker_memory = shared_memory.SharedMemory(name=name)
+    worker_q_table = np.ndarray(shape, dtype=dtype, buffer=worker_memory.buf)
+
+
+def train_worker(task: tuple) -> dict:
+    """
+    Function that trains an Agent of the worker process on the shared Q-table. The updates are not synchronized with the other workers (Hogwild): a Q-value written by two workers at the same time keeps one of the two updates
+
+    Args:
+        task (tuple): (worker, seed, epsilon, episodes, alpha, gamma, num_envs, planning_steps, patience)
+
+    Returns:
+        dict: the worker, its seed and epsilon, the episodes and the steps of its training and its wall time
+    """
+    worker, seed, epsilon, episodes, alpha, gamma, num_envs, planning_steps, patience = task
+    random.seed(seed)
+    agent = Agent(worker_env, dtype=worker_q_table.dtype, q_table=worker_q_table)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent.train(
+            alpha=alpha,
+            gamma=gamma,
+            epsilon=epsilon,
+            episodes=episodes,
+            num_envs=num_envs,
+            patience=patience,
+            planning_steps=planning_steps,
+        )
+    elapsed = time.perf_counter() - start
+
+    return {
+        "worker": worker,
+        "seed": seed,
+        "epsilon": epsilon,
+        "episodes": agent.episodes,
+        "steps": agent.steps,
+        "time": round(elapsed, 4),
+    }
+
+
+def train(
+    agent: Agent,
+    alpha=0.3,
+    gamma=0.9,
+    epsilon=0.3,
+    episodes=5000,
+    workers=2,
+    seed=0,
+    num_envs=1,
+    planning_steps=0,
+    patience=None,
+) -> list:
+    """
+    Function that trains an Agent with several worker processes. Every worker runs its share of the episodes on its own copy of the environment, with its own seed and epsilon (see worker_epsilons), and all of them update a single Q-table placed in shared memory without locks
+
+    Args:
+        agent (Agent): the Agent, its dense Q-table is the initial shared Q-table and it receives the trained one
+        alpha (float): learning rate hyperparameter
+        gamma (float): discount factor hyperparameter
+        epsilon (float): epsilon of the first worker, the other workers explore less
+        episodes (int): total number of episodes, split among the workers
+        workers (int): the number of worker processes
+        seed (int): the seed of the first worker, the worker i uses seed + i
+        num_envs (int): number of episodes advanced together in lock-step by every worker
+        planning_steps (int): Dyna-Q planning backups after every real step of every worker, with a model per worker
+        patience (int | None): early stopping patience of every worker (see Agent.train)
+
+    Returns:
+        list: the results of the workers
+    """
+    # do not re-run training if already executed
+    if agent.trained:
+        return []
+    if not isinstance(agent.q_table, np.ndarray):
+        raise RuntimeError("The parallel training requires a dense Q-table")
+
+    epsilons = worker_epsilons(epsilon, workers)
+    tasks = [
+        (
+            i,
+            seed + i,
+            epsilons[i],
+            episodes // workers + (i < episodes % workers),
+            alpha,
+            gamma,
+            num_envs,
+            planning_steps,
+            patience,
+        )
+        for i in range(0, workers)
+    ]
+
+    memory = shared_memory.SharedMemory(create=True, size=agent.q_table.nbytes)
+    try:
+        shared_q_table = np.ndarray(agent.q_table.shape, dtype=agent.q_table.dtype, buffer=memory.buf)
+        shared_q_table[:] = agent.q_table
+
+        start = time.perf_counter()
+        with mp.Pool(
+            workers,
+            initializer=init_worker,
+            initargs=(agent.env.arena_array(), memory.name, agent.q_table.shape, agent.q_table.dtype.str),
+        ) as pool:
+            results = pool.map(train_worker, tasks)
+        elapsed = time.perf_counter() - start
+
+        # the trained Q-table is copied out of the shared memory before it is released
+        agent.q_table = shared_q_table.copy()
+        del shared_q_table
+    finally:
+        memory.close()
+        memory.unlink()
+
+    total_steps = sum(result["steps"] for result in results)
+    for result in results:
+        print(
+            f"worker {result['worker']}: epsilon {result['epsilon']} - {result['episodes']} episodes - {result['steps']} steps in {result['time']:.2f}s"
+        )
+    print("training completed")
+    print(
+        f"{workers} workers: {total_steps} steps in {elapsed:.2f}s - {total_steps / elapsed if elapsed > 0 else 0:.0f} steps/s"
+    )
+
+    agent.hyperparameters = {
+        "method": "hogwild q-learning" if planning_steps == 0 else "hogwild dyna-q",
+        "alpha": alpha,
+        "gamma": gamma,
+        "epsilons": epsilons,
+        "episodes": episodes,
+        "workers": workers,
+        "num_envs": num_envs,
+    }
+    if planning_steps > 0:
+        agent.hyperparameters["planning_steps"] = planning_steps
+    agent.episodes = sum(result["episodes"] for result in results)
+    agent.steps = total_steps
+    agent.trained = True
+
+    return results
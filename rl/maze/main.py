@@ -1,43 +1,236 @@
 from environment import Environment
 from agent import Agent
 from args import Args
+import evaluation
+import hogwild
+import json
+import numpy as np
+import os
+import policy
+import random
+import sweep
+import sys
 
 
-def run(
-    alpha: float, gamma: float, epsilon: float, episodes: int, shape: tuple
-) -> None:
-    change_arena = True
+def load_environment(
+    shape: tuple,
+    arena_file: str | None,
+    load_policy: str | None,
+    obstacle_prob=0.2,
+    seed=None,
+) -> Environment:
+    """
+    Function that returns the environment: the arena is read from the arena file, or from the policy file, if they exist. Otherwise it is generated (and saved to the arena file)
+
+    Args:
+        shape (tuple): the (x: int, y: int) shape of a generated arena
+        arena_file (str | None): the maze file of the arena (.txt, .mzb or .npy)
+        load_policy (str | None): the policy file (or directory of policy files) to load
+        obstacle_prob (float): the probability [0, 1] of the generation of an obstacle
+        seed (int | None): the seed of a generated arena, with a seed (or without a terminal) the arena is not confirmed interactively
+
+    Returns:
+        Environment: the environment
+    """
     env = Environment(shape=shape)
 
-    # arena generation loop
-    while change_arena:
-        env.generate_arena()
+    if arena_file is not None and os.path.exists(arena_file):
+        env.load_file(arena_file)
         print(env)
-        choice = input("Generate a new arena? [y/n] ")
+        return env
+
+    if load_policy is not None and os.path.isfile(load_policy):
+        env.load_arena(policy.load(load_policy)["arena"])
+        print(env)
+        return env
 
+    # the generated arenas are always solvable: the Exit can be reached from the Agent starting position
+    env.generate_arena(obstacle_prob=obstacle_prob, seed=seed)
+    print(env)
+
+    # arena generation loop, only when a user can answer
+    interactive = seed is None and sys.stdin.isatty()
+    while interactive:
+        choice = input("Generate a new arena? [y/n] ")
         if choice == "n" or choice == "N":
-            change_arena = False
+            break
+        env.generate_arena(obstacle_prob=obstacle_prob)
+        print(env)
+
+    if arena_file is not None:
+        env.save_file(arena_file)
+
+    return env
+
+
+def run(
+    alpha: float,
+    gamma: float,
+    epsilon: float,
+    episodes: int,
+    num_envs: int,
+    planning_steps: int,
+    patience: int | None,
+    tolerance: float | None,
+    metrics_file: str | None,
+    metrics_interval: int,
+    plan: str | None,
+    dtype: str,
+    q_table: str,
+    shape: tuple,
+    arena_file: str | None,
+    save_policy: str | None,
+    load_policy: str | None,
+    headless: bool,
+    fps: float,
+    obstacle_prob: float,
+    seed: int | None,
+    hogwild_workers: int | None,
+    evaluate: bool,
+) -> None:
+    if seed is not None:
+        # the training draws its actions from the random module (the vectorized trainer seeds its generator from it), so the whole run is reproducible
+        random.seed(seed)
+    env = load_environment(shape, arena_file, load_policy, obstacle_prob, seed)
+
+    agent = Agent(env, dtype=np.dtype(dtype), backend=q_table)
+    if load_policy is not None:
+        # a policy of the same arena replaces the training
+        path = policy.policy_path(load_policy, env.arena_hash())
+        if os.path.exists(path):
+            agent.load_policy(path)
+            print(f"policy loaded from {path}")
+        else:
+            print(f"no policy of this arena in {path}")
+
+    if plan is not None:
+        # Agent planning: the Q-table is computed from the arena, without training
+        agent.plan(method=plan, gamma=gamma)
+
+    if hogwild_workers is not None:
+        # Agent training with several processes sharing the Q-table (skipped if the Q-table was planned or loaded)
+        hogwild.train(
+            agent,
+            alpha=alpha,
+            gamma=gamma,
+            epsilon=epsilon,
+            episodes=episodes,
+            workers=hogwild_workers,
+            # the worker i is seeded with --seed + i
+            seed=seed if seed is not None else 0,
+            num_envs=num_envs,
+            planning_steps=planning_steps,
+            patience=patience,
+        )
+
+    # Agent training (skipped if the Q-table was planned, loaded or trained by the workers)
+    agent.train(
+        alpha=alpha,
+        gamma=gamma,
+        epsilon=epsilon,
+        episodes=episodes,
+        num_envs=num_envs,
+        patience=patience,
+        tolerance=tolerance,
+        metrics_file=metrics_file,
+        metrics_interval=metrics_interval,
+        planning_steps=planning_steps,
+    )
 
-    agent = Agent(env)
-    # Agent training
-    agent.train(alpha=alpha, gamma=gamma, epsilon=epsilon, episodes=episodes)
+    if save_policy is not None:
+        print(f"policy saved to {agent.save_policy(save_policy)}")
+
+    if evaluate:
+        # the greedy policy from every free cell of the arena
+        print(evaluation.summary(evaluation.evaluate(env, agent.q_table)))
 
     print("Exec...")
 
     # Agent execution
-    agent.exec()
+    trajectory, total_reward = agent.exec(headless=headless, fps=fps)
+    if env.done:
+        print(f"exit reached in {len(trajectory) - 1} steps - total reward: {total_reward}")
+    else:
+        print(f"exit not reached in {len(trajectory) - 1} steps - total reward: {total_reward}")
+
+
+def run_sweep(
+    alphas: list,
+    gammas: list,
+    epsilons: list,
+    seeds: int,
+    samples: int | None,
+    episodes: int,
+    patience: int,
+    num_envs: int,
+    workers: int,
+    shape: tuple,
+    arena_file: str | None,
+    output: str | None,
+    obstacle_prob: float,
+    seed: int | None,
+) -> None:
+    env = load_environment(shape, arena_file, None, obstacle_prob, seed)
+
+    if samples is not None:
+        configs = sweep.random_configs(alphas, gammas, epsilons, seeds, samples)
+    else:
+        configs = sweep.grid_configs(alphas, gammas, epsilons, seeds)
+
+    results = sweep.run(env, configs, episodes, patience, num_envs, workers)
+
+    if output is not None:
+        with open(output, "w") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
 
 
 def main() -> None:
     # parse cli args
     cli_args = Args().parse_args()
+    if cli_args.sweep:
+        run_sweep(
+            cli_args.alpha_grid or [cli_args.alpha],
+            cli_args.gamma_grid or [cli_args.gamma],
+            cli_args.epsilon_grid or [cli_args.epsilon],
+            cli_args.seeds,
+            cli_args.samples,
+            cli_args.episodes,
+            cli_args.patience or 20,
+            cli_args.num_envs,
+            cli_args.workers,
+            cli_args.shape,
+            cli_args.arena_file,
+            cli_args.sweep_output,
+            cli_args.obstacle_prob,
+            cli_args.seed,
+        )
+        return
     # execution
     run(
         cli_args.alpha,
         cli_args.gamma,
         cli_args.epsilon,
         cli_args.episodes,
+        cli_args.num_envs,
+        cli_args.planning_steps,
+        cli_args.patience,
+        cli_args.tolerance,
+        cli_args.metrics_file,
+        cli_args.metrics_interval,
+        cli_args.plan,
+        cli_args.dtype,
+        cli_args.q_table,
         cli_args.shape,
+        cli_args.arena_file,
+        cli_args.save_policy,
+        cli_args.load_policy,
+        cli_args.headless,
+        cli_args.fps,
+        cli_args.obstacle_prob,
+        cli_args.seed,
+        cli_args.workers if cli_args.hogwild else None,
+        cli_args.evaluate,
     )
 
 
@@ -0,0 +1,163 @@
+import numpy as np
+import os
+
+# the characters of the tiles in the text format: 0 empty, 1 the Agent, 2 the Exit, 3 an obstacle
+TEXT_TILES = b".AE#"
+
+# the header of the bit-packed format: the magic string, then the rows and the columns as little-endian uint32
+PACKED_MAGIC = b"MAZEBITS"
+PACKED_HEADER = len(PACKED_MAGIC) + 8
+
+# the formats of the maze files, chosen by their extension
+FORMATS = {".txt": "text", ".mzb": "packed", ".npy": "npy"}
+
+
+def file_format(path: str) -> str:
+    """
+    Function that returns the format of a maze file from its extension
+
+    Formats:
+        .txt -> text: one character per tile, one line per row ('.' empty, 'A' the Agent, 'E' the Exit, '#' an obstacle)
+        .mzb -> packed: a header and the obstacle mask with one bit per tile, the Agent and the Exit are at their fixed positions
+        .npy -> npy: the NumPy grid with one byte per tile
+
+    Args:
+        path (str): the maze file
+
+    Returns:
+        str: text, packed or npy
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise RuntimeError(f"Unknown maze file extension '{extension}', expected one of {', '.join(FORMATS)}")
+    return FORMATS[extension]
+
+
+def load(path: str, mmap=True) -> np.ndarray:
+    """
+    Function that loads an arena from a maze file
+
+    Args:
+        path (str): the maze file (.txt, .mzb or .npy)
+        mmap (bool): memory-map the binary files instead of reading them (a .npy arena is then read-only)
+
+    Returns:
+        np array: the arena grid with one byte per tile
+    """
+    fmt = file_format(path)
+    if fmt == "text":
+        return load_text(path)
+    elif fmt == "packed":
+        return load_packed(path, mmap=mmap)
+    return np.load(path, mmap_mode="r" if mmap else None)
+
+
+def save(path: str, arena: np.ndarray) -> None:
+    """
+    Function that saves an arena to a maze file
+
+    Args:
+        path (str): the maze file (.txt, .mzb or .npy)
+        arena (np array): the arena grid
+    """
+    fmt = file_format(path)
+    if fmt == "text":
+        save_text(path, arena)
+    elif fmt == "packed":
+        save_packed(path, arena)
+    else:
+        np.save(path, np.asarray(arena, dtype=np.uint8))
+
+
+def load_text(path: str) -> np.ndarray:
+    """
+    Function that loads an arena saved with save_text
+
+    Args:
+        path (str): the text file
+
+    Returns:
+        np array: the arena grid with one byte per tile
+    """
+    with open(path, "rb") as f:
+        lines = f.read().split()
+
+    if len(lines) == 0 or any(len(line) != len(lines[0]) for line in lines):
+        raise RuntimeError(f"'{path}' is not a maze file: the rows must have the same length")
+
+    # the tile of every character, 255 for the other characters
+    tiles = np.full(256, 255, dtype=np.uint8)
+    tiles[np.frombuffer(TEXT_TILES, dtype=np.uint8)] = np.arange(len(TEXT_TILES))
+    arena = tiles[np.frombuffer(b"".join(lines), dtype=np.uint8)].reshape(len(lines), len(lines[0]))
+    if (arena == 255).any():
+        raise RuntimeError(f"'{path}' is not a maze file: the tiles must be one of '{TEXT_TILES.decode()}'")
+
+    return arena
+
+
+def save_text(path: str, arena: np.ndarray) -> None:
+    """
+    Function that saves an arena as text, one character per tile and one line per row
+
+    Args:
+        path (str): the text file
+        arena (np array): the arena grid
+    """
+    chars = np.frombuffer(TEXT_TILES, dtype=np.uint8)[np.asarray(arena)]
+    # a newline at the end of every row
+    rows = np.concatenate((chars, np.full((chars.shape[0], 1), ord("\n"), dtype=np.uint8)), axis=1)
+    with open(path, "wb") as f:
+        f.write(rows.tobytes())
+
+
+def load_packed(path: str, mmap=True) -> np.ndarray:
+    """
+    Function that loads an arena saved with save_packed
+
+    Args:
+        path (str): the bit-packed file
+        mmap (bool): memory-map the obstacle mask instead of reading it
+
+    Returns:
+        np array: the arena grid with one byte per tile
+    """
+    with open(path, "rb") as f:
+        header = f.read(PACKED_HEADER)
+    if len(header) != PACKED_HEADER or header[: len(PACKED_MAGIC)] != PACKED_MAGIC:
+        raise RuntimeError(f"'{path}' is not a bit-packed maze file")
+
+    rows, cols = np.frombuffer(header, dtype="<u4", offset=len(PACKED_MAGIC)).tolist()
+    size = (rows * cols + 7) // 8
+    if os.path.getsize(path) != PACKED_HEADER + size:
+        raise RuntimeError(f"'{path}' is truncated: expected {size} bytes of a {rows}x{cols} obstacle mask")
+
+    if mmap:
+        packed = np.memmap(path, dtype=np.uint8, mode="r", offset=PACKED_HEADER, shape=(size,))
+    else:
+        packed = np.fromfile(path, dtype=np.uint8, offset=PACKED_HEADER)
+
+    # 3 where the bit of the obstacle is set, 0 otherwise
+    arena = np.unpackbits(packed, count=rows * cols).reshape(rows, cols)
+    arena *= 3
+    arena[rows - 1, 0] = 1
+    arena[0, cols - 1] = 2
+    return arena
+
+
+def save_packed(path: str, arena: np.ndarray) -> None:
+    """
+    Function that saves the obstacle mask of an arena with one bit per tile. The Agent and the Exit are not saved: they are always at the bottom left and at the top right corner
+
+    Args:
+        path (str): the bit-packed file
+        arena (np array): the arena grid
+    """
+    arena = np.asarray(arena)
+    rows, cols = arena.shape
+    if arena[rows - 1, 0] != 1 or arena[0, cols - 1] != 2:
+        raise RuntimeError("Only the arenas with the Agent at the bottom left and the Exit at the top right corner can be bit-packed")
+
+    with open(path, "wb") as f:
+        f.write(PACKED_MAGIC)
+        f.write(np.array([rows, cols], dtype="<u4").tobytes())
+        f.write(np.packbits(arena == 3).tobytes())
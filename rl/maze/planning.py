@@ -0,0 +1,178 @@
+from environment import Environment
+import numpy as np
+
+
+class Planner:
+    """
+    Planner that solves the maze MDP exactly: the arena is fully known and deterministic, so the transition table of the environment and the reward of every (state, action) pair are the whole model.
+
+    The reward of the environment grows with the total steps of the Agent, so it is not a function of the state. The planner uses the per-step rewards it is made of:
+
+        - -1: for each step
+        - -100: if a wall collision occurred
+        - +10000: if the Agent reaches the exit, the exit is a terminal state
+
+    Both algorithms compute the Q-values of every (state, action) pair of the states connected to the exit with one NumPy operation (Bellman backup):
+
+        Q(state, action) = reward(state, action) + gamma * V(next_state), V(exit) = 0
+
+    where:
+        - value iteration: V(state) = max_action(Q(state, action)), repeated until V changes less than a tolerance
+
+        - policy iteration: V(state) = Q(state, policy(state)) repeated until V changes less than a tolerance (policy evaluation), then policy(state) = argmax_action(Q(state, action)) (policy improvement), repeated until the policy does not change
+
+    With gamma close to 0 the exit reward vanishes after a few steps (10000 * gamma^steps), so on large arenas gamma must be close to 1 for the greedy policy to see the exit
+    """
+
+    def __init__(self, env: Environment, gamma=0.9, dtype=np.float64):
+        """
+        Planner constructor
+
+        Args:
+            env (Environment): the environment to solve
+            gamma (float): discount factor (0 <= gamma < 1)
+            dtype (np dtype): the type of the returned Q-values, np.float32 or np.float64 (the backups always use float64)
+
+        Attributes:
+            env (Environment): the environment to solve
+            gamma (float): discount factor
+            dtype (np dtype): the type of the Q-values
+            rewards (np array): the reward of every (state, action) pair with shape (state space, action space)
+            terminal (np array): set to True for the (state, action) pairs that reach the exit
+            states (np array): the indexes of the states connected to the exit
+            iterations (int): the Bellman backups executed by the last solve
+        """
+        if gamma < 0 or gamma >= 1:
+            raise RuntimeError("Planning requires 0 <= gamma < 1")
+
+        self.env = env
+        self.gamma = gamma
+        self.dtype = np.dtype(dtype)
+
+        transitions = env.transitions
+        # a move that leaves the Agent in the same state is a collision
+        collision = transitions == np.arange(env.state_space)[:, None]
+        self.terminal = transitions == env.exit_index
+        self.rewards = (-1 - 100 * collision + 10000 * self.terminal).astype(np.float64)
+        # the exit is terminal: it has no actions
+        self.rewards[env.exit_index] = 0
+        self.terminal[env.exit_index] = True
+
+        # the moves are reversible, so the states connected to the exit only move among themselves. The backups run on them only:
+        # the other states never reach the exit and their values would converge geometrically (gamma^iterations)
+        self.states = self.__connected_states()
+        # the transition table of the connected states, with their indexes among them. The terminal transitions point to an extra
+        # last state whose value is always 0
+        position = np.full(env.state_space, self.states.size, dtype=np.int64)
+        position[self.states] = np.arange(self.states.size)
+        self.__transitions = np.where(self.terminal[self.states], self.states.size, position[transitions[self.states]])
+        self.__rewards = self.rewards[self.states]
+        self.iterations = 0
+
+    def __connected_states(self) -> np.ndarray:
+        """
+        Function that finds the states connected to the exit with a BFS over the transition table, one NumPy operation per level
+
+        Returns:
+            np array: the sorted indexes of the connected states
+        """
+        transitions = self.env.transitions
+        visited = np.zeros(self.env.state_space, dtype=bool)
+        visited[self.env.exit_index] = True
+        frontier = np.array([self.env.exit_index])
+        while frontier.size != 0:
+            neighbors = np.unique(transitions[frontier])
+            frontier = neighbors[~visited[neighbors]]
+            visited[frontier] = True
+        return np.flatnonzero(visited)
+
+    def __backup(self, values: np.ndarray) -> np.ndarray:
+        """
+        Function that executes a Bellman backup of all the (state, action) pairs of the connected states
+
+        Args:
+            values (np array): the value of every connected state, followed by the 0 value of the terminal transitions
+
+        Returns:
+            np array: the Q-values with shape (connected states, action space)
+        """
+        return self.__rewards + self.gamma * values[self.__transitions]
+
+    def __q_table(self, values: np.ndarray) -> np.ndarray:
+        """
+        Function that returns the Q-table of all the states: the states that are not connected to the exit keep their immediate rewards
+
+        Args:
+            values (np array): the value of every connected state, followed by the 0 value of the terminal transitions
+
+        Returns:
+            np array: the Q-table with shape (state space, action space), compatible with Agent.q_table
+        """
+        q_table = self.rewards.astype(self.dtype)
+        q_table[self.states] = self.__backup(values)
+        return q_table
+
+    def value_iteration(self, tolerance=1e-6, max_iterations=1000000) -> np.ndarray:
+        """
+        Function that solves the MDP with value iteration
+
+        Args:
+            tolerance (float): the largest change of a state value of the last iteration
+            max_iterations (int): the maximum number of iterations
+
+        Returns:
+            np array: the optimal Q-table with shape (state space, action space), compatible with Agent.q_table
+        """
+        values = np.zeros(self.states.size + 1)
+        self.iterations = 0
+
+        while self.iterations < max_iterations:
+            self.iterations += 1
+            next_values = self.__backup(values).max(axis=1)
+            delta = np.max(np.abs(next_values - values[:-1]))
+            values[:-1] = next_values
+            if delta < tolerance:
+                break
+
+        return self.__q_table(values)
+
+    def policy_iteration(self, tolerance=1e-6, evaluation_sweeps=100, max_iterations=1000000) -> np.ndarray:
+        """
+        Function that solves the MDP with (modified) policy iteration: every policy evaluation runs at most evaluation_sweeps backups
+
+        Args:
+            tolerance (float): the largest change of a state value of the last iteration of the policy evaluation
+            evaluation_sweeps (int): the maximum number of backups of every policy evaluation
+            max_iterations (int): the maximum number of backups
+
+        Returns:
+            np array: the optimal Q-table with shape (state space, action space), compatible with Agent.q_table
+        """
+        states = np.arange(self.states.size)
+        values = np.zeros(self.states.size + 1)
+        # the initial policy is greedy with respect to the immediate rewards
+        policy = np.argmax(self.__rewards, axis=1)
+        self.iterations = 0
+
+        while self.iterations < max_iterations:
+            # policy evaluation: the values of the current policy, starting from the values of the previous policy
+            transitions = self.__transitions[states, policy]
+            rewards = self.__rewards[states, policy]
+            for _ in range(0, evaluation_sweeps):
+                self.iterations += 1
+                next_values = rewards + self.gamma * values[transitions]
+                delta = np.max(np.abs(next_values - values[:-1]))
+                values[:-1] = next_values
+                if delta < tolerance or self.iterations >= max_iterations:
+                    break
+
+            # policy improvement: the greedy policy of the values, ties keep the current action
+            q_table = self.__backup(values)
+            next_policy = np.argmax(q_table, axis=1)
+            keep = q_table[states, policy] >= q_table[states, next_policy]
+            next_policy[keep] = policy[keep]
+            if delta < tolerance and np.array_equal(next_policy, policy):
+                break
+            policy = next_policy
+
+        return self.__q_table(values)
@@ -0,0 +1,105 @@
+import json
+import numpy as np
+import os
+import zipfile
+
+# the members of a policy file (an uncompressed .npz archive)
+MEMBERS = ("q_table", "arena", "arena_hash", "hyperparameters")
+
+
+def policy_path(path: str, arena_hash: str) -> str:
+    """
+    Function that returns the policy file of an arena: a directory contains one policy file per arena, named after the arena hash
+
+    Args:
+        path (str): a policy file (.npz) or a directory of policy files
+        arena_hash (str): the content hash of the arena
+
+    Returns:
+        str: the policy file
+    """
+    if os.path.isdir(path):
+        return os.path.join(path, f"{arena_hash}.npz")
+    return path
+
+
+def save(path: str, q_table: np.ndarray, arena: np.ndarray, arena_hash: str, hyperparameters: dict) -> None:
+    """
+    Function that saves a Q-table together with its arena and the hyperparameters that produced it. The archive is not compressed, so that the Q-table can be memory-mapped on load
+
+    Args:
+        path (str): the policy file (.npz)
+        q_table (np array): the Q-table with shape (state space, action space)
+        arena (np array): the arena grid
+        arena_hash (str): the content hash of the arena
+        hyperparameters (dict): the hyperparameters of the training (or of the planning)
+    """
+    # np.savez appends .npz to the paths without it, the file is opened here to keep the path as it is
+    with open(path, "wb") as f:
+        np.savez(
+            f,
+            q_table=np.ascontiguousarray(q_table),
+            arena=arena,
+            arena_hash=np.array(arena_hash),
+            hyperparameters=np.array(json.dumps(hyperparameters)),
+        )
+
+
+def load(path: str, mmap=True) -> dict:
+    """
+    Function that loads a policy file saved with save
+
+    Args:
+        path (str): the policy file (.npz)
+        mmap (bool): memory-map the Q-table instead of reading it, so that the load does not depend on its size
+
+    Returns:
+        dict: the q_table (read-only if memory-mapped), the arena, the arena_hash and the hyperparameters of the policy
+    """
+    with np.load(path) as data:
+        if any(member not in data.files for member in MEMBERS):
+            raise RuntimeError(f"'{path}' is not a policy file")
+        policy = {
+            "arena": data["arena"],
+            "arena_hash": str(data["arena_hash"]),
+            "hyperparameters": json.loads(str(data["hyperparameters"])),
+        }
+        policy["q_table"] = map_member(path, "q_table") if mmap else data["q_table"]
+
+    return policy
+
+
+def map_member(path: str, name: str) -> np.ndarray:
+    """
+    Function that memory-maps an array stored without compression in a .npz archive
+
+    Args:
+        path (str): the .npz archive
+        name (str): the name of the array
+
+    Returns:
+        np array: the read-only memory map of the array
+    """
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo(f"{name}.npy")
+        if info.compress_type != zipfile.ZIP_STORED:
+            raise RuntimeError(f"'{name}' is compressed in '{path}' and cannot be memory-mapped")
+
+    with open(path, "rb") as f:
+        # the local header of the member: 30 bytes, the file name and an extra field, then the .npy data
+        f.seek(info.header_offset)
+        header = f.read(30)
+        name_length = int.from_bytes(header[26:28], "little")
+        extra_length = int.from_bytes(header[28:30], "little")
+        f.seek(info.header_offset + 30 + name_length + extra_length)
+
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+
+    return np.memmap(
+        path, dtype=dtype, mode="r", shape=shape, order="F" if fortran_order else "C", offset=offset
+    )
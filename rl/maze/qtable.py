@@ -0,0 +1,185 @@
+from environment import Environment
+import generator
+import numpy as np
+import sys
+
+# the Q-table backends: a dense array, a compact array of the reachable states, a lazily allocated table of the visited states
+BACKENDS = ("dense", "compact", "lazy")
+
+
+def make_q_table(env: Environment, backend="dense", dtype=np.float64):
+    """
+    Function that allocates a Q-table of the environment, all Q-values are 0. Every backend is indexed like the dense array by the Agent:
+    q_table[state] (the Q-values of the actions), q_table[state, action] and q_table[state, action] = value, with ints or NumPy arrays of state indexes
+
+    Args:
+        env (Environment): the environment
+        backend (str): dense, compact or lazy
+        dtype (np dtype): the type of the Q-values
+
+    Returns:
+        np array | CompactQTable | LazyQTable: the Q-table with shape (state space, action space)
+    """
+    if backend == "dense":
+        return np.zeros((env.state_space, env.action_space), dtype=dtype)
+    elif backend == "compact":
+        return CompactQTable(env, dtype=dtype)
+    elif backend == "lazy":
+        return LazyQTable(env, dtype=dtype)
+    raise RuntimeError(f"Unknown Q-table backend '{backend}'")
+
+
+class CompactQTable:
+    """
+    Q-table with a row for every state that the Agent can reach from its starting position only: the obstacles and the free tiles cut off from the Agent never get a row.
+    A remapping array maps every state index to its row, the states that cannot be reached share an extra row of zeros that is never updated. The remapping array uses the narrowest unsigned integer type that holds the rows
+    """
+
+    def __init__(self, env: Environment, dtype=np.float64):
+        """
+        CompactQTable constructor
+
+        Args:
+            env (Environment): the environment
+            dtype (np dtype): the type of the Q-values
+
+        Attributes:
+            shape (tuple): the (state space, action space) shape of the equivalent dense Q-table
+            dtype (np dtype): the type of the Q-values
+            reachable (int): the number of the states reachable from the Agent starting position
+            position (np array): the row of every state index, reachable for the states that cannot be reached
+            values (np array): the Q-values with shape (reachable states + 1, action space)
+        """
+        self.shape = (env.state_space, env.action_space)
+        self.dtype = np.dtype(dtype)
+        # the states reachable from the Agent starting position, found with a BFS over the arena (one byte per state)
+        mask = generator.reachable(env.arena, env.start_pos).reshape(-1)
+        self.reachable = int(np.count_nonzero(mask))
+        # the row of a reachable state is the number of reachable states before it, computed in place with the type of the remapping array
+        self.position = np.cumsum(mask, dtype=np.min_scalar_type(self.reachable))
+        self.position -= mask
+        # the unreachable states point to the extra row
+        self.position[~mask] = self.reachable
+        del mask
+        self.values = np.zeros((self.reachable + 1, env.action_space), dtype=dtype)
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            state_index, action_index = key
+            return self.values[self.position[state_index], action_index]
+        return self.values[self.position[key]]
+
+    def __setitem__(self, key, value) -> None:
+        state_index, action_index = key
+        self.values[self.position[state_index], action_index] = value
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        q_table = np.zeros(self.shape, dtype=dtype or self.dtype)
+        # the reachable states are the ones that do not point to the extra row
+        states = self.position != self.reachable
+        q_table[states] = self.values[:-1]
+        return q_table
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The bytes of the remapping array and of the Q-values
+        """
+        return self.position.nbytes + self.values.nbytes
+
+
+class LazyQTable:
+    """
+    Q-table that allocates the row of a state the first time that the state is updated: a dict maps the state indexes to their rows of a Q-values array that doubles when it is full.
+    The states never updated share a row of zeros, so that the memory scales with the states that the Agent visits and not with the arena
+    """
+
+    def __init__(self, env: Environment, dtype=np.float64, capacity=1024):
+        """
+        LazyQTable constructor
+
+        Args:
+            env (Environment): the environment
+            dtype (np dtype): the type of the Q-values
+            capacity (int): the rows allocated at first
+
+        Attributes:
+            shape (tuple): the (state space, action space) shape of the equivalent dense Q-table
+            dtype (np dtype): the type of the Q-values
+            rows (dict): the row of every updated state index, row 0 is the row of zeros
+            values (np array): the Q-values with shape (capacity, action space)
+        """
+        self.shape = (env.state_space, env.action_space)
+        self.dtype = np.dtype(dtype)
+        self.rows = {}
+        self.values = np.zeros((max(capacity, 2), env.action_space), dtype=dtype)
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            state_index, action_index = key
+            return self.values[self.__lookup(state_index), action_index]
+        if np.ndim(key) == 0:
+            # the single state lookups of the training run once per step
+            return self.values[self.rows.get(int(key), 0)]
+        return self.values[self.__lookup(key)]
+
+    def __setitem__(self, key, value) -> None:
+        state_index, action_index = key
+        # the rows are allocated before self.values is read: an allocation can replace self.values with a larger array
+        if np.ndim(state_index) == 0:
+            rows = self.__row(int(state_index))
+        else:
+            rows = [self.__row(i) for i in np.asarray(state_index).tolist()]
+        self.values[rows, action_index] = value
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        q_table = np.zeros(self.shape, dtype=dtype or self.dtype)
+        q_table[list(self.rows.keys())] = self.values[list(self.rows.values())]
+        return q_table
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The bytes of the Q-values, of the dict of the rows and of its int keys and values (every int counted once per entry, the small ints shared by Python included)
+        """
+        return (
+            self.values.nbytes
+            + sys.getsizeof(self.rows)
+            + sum(map(sys.getsizeof, self.rows.keys()))
+            + sum(map(sys.getsizeof, self.rows.values()))
+        )
+
+    def __lookup(self, state_index):
+        """
+        Function that returns the rows of state indexes without allocating them
+
+        Args:
+            state_index (int | np array): the state indexes
+
+        Returns:
+            int | list: the rows, 0 for the states never updated
+        """
+        if np.ndim(state_index) == 0:
+            return self.rows.get(int(state_index), 0)
+        return [self.rows.get(i, 0) for i in np.asarray(state_index).tolist()]
+
+    def __row(self, state_index: int) -> int:
+        """
+        Function that returns the row of a state index, allocating it if the state was never updated
+
+        Args:
+            state_index (int): the state index
+
+        Returns:
+            int: the row
+        """
+        row = self.rows.get(state_index)
+        if row is None:
+            row = len(self.rows) + 1
+            if row == len(self.values):
+                # the Q-values array doubles
+                values = np.zeros((2 * len(self.values), self.shape[1]), dtype=self.dtype)
+                values[: len(self.values)] = self.values
+                self.values = values
+            self.rows[state_index] = row
+        return row
@@ -0,0 +1,126 @@
+from environment import Environment
+import sys
+import tiles
+import time
+
+# ANSI escape sequences: save and restore the cursor position, move the cursor up n lines, move it to column n, clear the line
+SAVE_CURSOR = "\x1b7"
+RESTORE_CURSOR = "\x1b8"
+CURSOR_UP = "\x1b[{}A"
+CURSOR_COLUMN = "\x1b[{}G"
+CLEAR_LINE = "\x1b[2K"
+
+# the status lines printed below the arena
+STATUS_LINES = 4
+
+
+class Renderer:
+    """
+    Renderer of the Agent exploration: the first frame draws the whole arena with a single write, the next frames only redraw the tiles that changed (the previous and the current Agent position) and the status lines, moving the cursor with ANSI escape sequences. The frames are paced to a configurable number of frames per second
+    """
+
+    def __init__(self, env: Environment, fps=1.0, stream=sys.stdout):
+        """
+        Renderer constructor
+
+        Args:
+            env (Environment): the environment to render
+            fps (float): frames per second, 0 to render as fast as possible
+            stream (file): the stream where the frames are written
+
+        Attributes:
+            env (Environment): the environment to render
+            fps (float): frames per second
+            stream (file): the stream where the frames are written
+        """
+        if fps < 0:
+            raise RuntimeError("The frames per second must be >= 0")
+
+        self.env = env
+        self.fps = fps
+        self.stream = stream
+        self.__agent_pos = None
+        self.__next_frame = None
+
+    def tile(self, x: int, y: int) -> str:
+        """
+        Function that returns the colored tile of a position of the arena (see tiles.colored_tile)
+
+        Args:
+            x (int): the x coordinate of the position in the arena
+            y (int): the y coordinate of the position in the arena
+
+        Returns:
+            str: the colored tile
+        """
+        return tiles.colored_tile(self.env.arena, self.env.agent_pos, x, y)
+
+    def frame(self) -> str:
+        """
+        Function that builds the whole arena (see tiles.frame)
+
+        Returns:
+            str: the arena, a line per row
+        """
+        return tiles.frame(self.env.arena, self.env.agent_pos)
+
+    def render(self) -> None:
+        """
+        Function that renders the current state of the environment: the whole frame the first time, the tiles that changed since the previous frame otherwise
+        """
+        self.__wait()
+
+        env = self.env
+        if self.__agent_pos is None:
+            self.stream.write(self.frame() + self.__status())
+        else:
+            rows = env.shape[0]
+            chunks = [SAVE_CURSOR]
+            for x, y in {self.__agent_pos, env.agent_pos}:
+                # the cursor is below the status lines, the row x is rows - x + STATUS_LINES lines above
+                chunks.append(CURSOR_UP.format(rows - x + STATUS_LINES) + CURSOR_COLUMN.format(2 * y + 1))
+                chunks.append(self.tile(x, y))
+                chunks.append(RESTORE_CURSOR + SAVE_CURSOR)
+            # the status lines are rewritten
+            chunks.append(CURSOR_UP.format(STATUS_LINES) + "\r")
+            chunks.append(self.__status(clear=True))
+            chunks.append(RESTORE_CURSOR)
+            self.stream.write("".join(chunks))
+
+        self.stream.flush()
+        self.__agent_pos = env.agent_pos
+
+    def __status(self, clear=False) -> str:
+        """
+        Function that returns the status lines of the current state
+
+        Args:
+            clear (bool): clear every line before writing it
+
+        Returns:
+            str: the status lines
+        """
+        env = self.env
+        prefix = CLEAR_LINE if clear else ""
+        return "".join(
+            f"{prefix}{line}\n"
+            for line in (
+                f"collision: {env.collision}",
+                f"   action: {env.last_action}",
+                f"     done: {env.done}",
+                f"     step: {env.steps}",
+            )
+        )
+
+    def __wait(self) -> None:
+        """
+        Function that waits until the time of the next frame
+        """
+        if self.fps == 0:
+            return
+
+        now = time.monotonic()
+        if self.__next_frame is not None and now < self.__next_frame:
+            time.sleep(self.__next_frame - now)
+            now = self.__next_frame
+        self.__next_frame = now + 1 / self.fps
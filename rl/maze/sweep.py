@@ -0,0 +1,177 @@
+from environment import Environment
+from agent import Agent
+import contextlib
+import io
+import itertools
+import multiprocessing as mp
+import numpy as np
+import random
+import time
+
+# the environment of the worker process, built once from the arena by init_worker
+worker_env = None
+
+
+def grid_configs(alphas: list, gammas: list, epsilons: list, seeds: int) -> list:
+    """
+    Function that returns every combination of the hyperparameter values, once per seed
+
+    Args:
+        alphas (list): the values of the alpha hyperparameter
+        gammas (list): the values of the gamma hyperparameter
+        epsilons (list): the values of the epsilon hyperparameter
+        seeds (int): the number of seeds of every combination
+
+    Returns:
+        list: the (alpha, gamma, epsilon, seed) configurations
+    """
+    return [
+        (alpha, gamma, epsilon, seed)
+        for alpha, gamma, epsilon in itertools.product(alphas, gammas, epsilons)
+        for seed in range(0, seeds)
+    ]
+
+
+def random_configs(alphas: list, gammas: list, epsilons: list, seeds: int, samples: int, seed=0) -> list:
+    """
+    Function that returns random combinations of hyperparameters, every hyperparameter is drawn uniformly between the smallest and the largest of its values
+
+    Args:
+        alphas (list): the values of the alpha hyperparameter
+        gammas (list): the values of the gamma hyperparameter
+        epsilons (list): the values of the epsilon hyperparameter
+        seeds (int): the number of seeds of every combination
+        samples (int): the number of combinations
+        seed (int): the seed of the draws
+
+    Returns:
+        list: the (alpha, gamma, epsilon, seed) configurations
+    """
+    rng = np.random.default_rng(seed)
+    configs = []
+    for _ in range(0, samples):
+        alpha, gamma, epsilon = (
+            round(float(rng.uniform(min(values), max(values))), 4) for values in (alphas, gammas, epsilons)
+        )
+        configs += [(alpha, gamma, epsilon, seed) for seed in range(0, seeds)]
+    return configs
+
+
+def init_worker(arena: np.ndarray) -> None:
+    """
+    Function that initializes a worker process: the arena is received once and its environment is built once
+
+    Args:
+        arena (np array): the arena grid
+    """
+    global worker_env
+    worker_env = Environment()
+    worker_env.load_arena(arena)
+
+
+def train(task: tuple) -> dict:
+    """
+    Function that trains an Agent with a configuration on the environment of the worker process
+
+    Args:
+        task (tuple): (alpha, gamma, epsilon, seed, episodes, patience, num_envs)
+
+    Returns:
+        dict: the configuration, the return of the greedy policy, the episodes to converge (None if the training did not converge) and the wall time
+    """
+    alpha, gamma, epsilon, seed, episodes, patience, num_envs = task
+    random.seed(seed)
+    agent = Agent(worker_env)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent.train(
+            alpha=alpha,
+            gamma=gamma,
+            epsilon=epsilon,
+            episodes=episodes,
+            num_envs=num_envs,
+            patience=patience,
+        )
+    elapsed = time.perf_counter() - start
+
+    # the greedy policy is evaluated without rendering
+    _, total_reward = agent.exec(headless=True)
+
+    return {
+        "alpha": alpha,
+        "gamma": gamma,
+        "epsilon": epsilon,
+        "seed": seed,
+        "return": float(total_reward) if worker_env.done else None,
+        "episodes": agent.episodes if agent.episodes < episodes else None,
+        "time": round(elapsed, 4),
+    }
+
+
+def rank(results: list) -> list:
+    """
+    Function that sorts the results: greedy policies that reach the exit first, then by return (highest first), episodes to converge and wall time
+
+    Args:
+        results (list): the results of the configurations
+
+    Returns:
+        list: the sorted results
+    """
+    return sorted(
+        results,
+        key=lambda result: (
+            result["return"] is None,
+            -(result["return"] or 0),
+            result["episodes"] is None,
+            result["episodes"] or 0,
+            result["time"],
+        ),
+    )
+
+
+def run(
+    env: Environment,
+    configs: list,
+    episodes: int,
+    patience: int,
+    num_envs: int,
+    workers: int,
+) -> list:
+    """
+    Function that trains one Agent per configuration across a pool of processes and prints the ranked results
+
+    Args:
+        env (Environment): the environment, its arena is sent once to every worker
+        configs (list): the (alpha, gamma, epsilon, seed) configurations
+        episodes (int): the maximum number of episodes of every training
+        patience (int): the early stopping patience of every training (see Agent.train)
+        num_envs (int): number of episodes advanced together in lock-step by every training
+        workers (int): the number of worker processes
+
+    Returns:
+        list: the ranked results
+    """
+    tasks = [(*config, episodes, patience, num_envs) for config in configs]
+    print(f"{len(tasks)} configurations - {workers} workers")
+
+    results = []
+    start = time.perf_counter()
+    with mp.Pool(workers, initializer=init_worker, initargs=(env.arena_array(),)) as pool:
+        for i, result in enumerate(pool.imap_unordered(train, tasks), start=1):
+            results.append(result)
+            print(f"trained: {i}/{len(tasks)}", end="\r")
+    print("")
+    print(f"sweep completed in {time.perf_counter() - start:.2f}s")
+
+    results = rank(results)
+    print(f"{'rank':>4} {'alpha':>7} {'gamma':>7} {'epsilon':>7} {'seed':>4} {'return':>10} {'episodes':>8} {'time':>8}")
+    for i, result in enumerate(results, start=1):
+        greedy = f"{result['return']:.0f}" if result["return"] is not None else "-"
+        converged = result["episodes"] if result["episodes"] is not None else "-"
+        print(
+            f"{i:>4} {result['alpha']:>7} {result['gamma']:>7} {result['epsilon']:>7} {result['seed']:>4} {greedy:>10} {converged:>8} {result['time']:>8.2f}"
+        )
+
+    return results
@@ -0,0 +1,137 @@
+import csv
+import json
+
+
+class TrainingMetrics:
+    """
+    Learning curve of a training: the metrics of the episodes are recorded every interval episodes and streamed to a CSV or JSONL file (chosen by the file extension)
+    """
+
+    # the metrics of an episode
+    FIELDS = ("episode", "return", "length", "collisions", "q_delta", "greedy_length")
+
+    def __init__(self, path: str | None = None, interval: int = 1):
+        """
+        TrainingMetrics constructor
+
+        Args:
+            path (str | None): the CSV (.csv) or JSONL (any other extension) file where the metrics are written, None to keep them only in memory
+            interval (int): the number of episodes between two recorded episodes
+
+        Attributes:
+            path (str | None): the file where the metrics are written
+            interval (int): the number of episodes between two recorded episodes
+            rows (list): the recorded metrics, a dict for every recorded episode
+        """
+        if interval < 1:
+            raise RuntimeError("The metrics interval must be at least 1 episode")
+
+        self.path = path
+        self.interval = interval
+        self.rows = []
+        self.__file = None
+        self.__writer = None
+
+        if path is not None:
+            self.__file = open(path, "w", newline="")
+            if path.endswith(".csv"):
+                self.__writer = csv.DictWriter(self.__file, fieldnames=TrainingMetrics.FIELDS)
+                self.__writer.writeheader()
+
+    def record(
+        self,
+        episode: int,
+        episode_return: float,
+        length: int,
+        collisions: int,
+        q_delta: float,
+        greedy_length: int | None,
+    ) -> None:
+        """
+        Function that records the metrics of an episode, if it is one of the recorded episodes
+
+        Args:
+            episode (int): the number of the episode, starting from 1
+            episode_return (float): the sum of the rewards of the episode
+            length (int): the steps of the episode
+            collisions (int): the collisions of the episode
+            q_delta (float): the largest change of a Q-value during the episode
+            greedy_length (int | None): the steps of the greedy policy to reach the exit after the episode, None if it does not reach it (or it was not checked)
+        """
+        if episode % self.interval != 0:
+            return
+
+        row = dict(
+            zip(
+                TrainingMetrics.FIELDS,
+                (episode, float(episode_return), int(length), int(collisions), float(q_delta), greedy_length),
+            )
+        )
+        self.rows.append(row)
+
+        if self.__writer is not None:
+            self.__writer.writerow(row)
+            self.__file.flush()
+        elif self.__file is not None:
+            self.__file.write(json.dumps(row) + "\n")
+            self.__file.flush()
+
+    def close(self) -> None:
+        """
+        Function that closes the metrics file
+        """
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+
+class EarlyStopping:
+    """
+    Convergence test of a training: it stops the training when, for patience consecutive episodes, the greedy policy reaches the exit with the same number of steps or the largest change of a Q-value is below tolerance
+    """
+
+    def __init__(self, patience: int, tolerance: float | None = None):
+        """
+        EarlyStopping constructor
+
+        Args:
+            patience (int): the number of consecutive episodes that satisfy a convergence condition
+            tolerance (float | None): the largest Q-value change of a converged episode, None to use only the greedy policy condition
+
+        Attributes:
+            patience (int): the number of consecutive episodes that satisfy a convergence condition
+            tolerance (float | None): the largest Q-value change of a converged episode
+        """
+        if patience < 1:
+            raise RuntimeError("The early stopping patience must be at least 1 episode")
+
+        self.patience = patience
+        self.tolerance = tolerance
+        self.__greedy_length = None
+        self.__stable = 0
+        self.__small_delta = 0
+
+    def update(self, q_delta: float, greedy_length: int | None) -> bool:
+        """
+        Function that updates the convergence test with the metrics of an episode
+
+        Args:
+            q_delta (float): the largest change of a Q-value during the episode
+            greedy_length (int | None): the steps of the greedy policy to reach the exit after the episode, None if it does not reach it
+
+        Returns:
+            bool: True if the training converged
+        """
+        # the greedy policy reaches the exit with the same steps of the previous episode
+        if greedy_length is not None and greedy_length == self.__greedy_length:
+            self.__stable += 1
+        else:
+            self.__stable = 1 if greedy_length is not None else 0
+        self.__greedy_length = greedy_length
+
+        if self.tolerance is not None and q_delta < self.tolerance:
+            self.__small_delta += 1
+        else:
+            self.__small_delta = 0
+
+        return self.__stable >= self.patience or self.__small_delta >= self.patience
@@ -0,0 +1,54 @@
+from colorama import Back, Style
+
+# the colored tiles: the Agent, the Exit, the obstacles and the empty tiles
+AGENT_TILE = f"{Back.BLUE}  {Style.RESET_ALL}"
+EXIT_TILE = f"{Back.GREEN}  {Style.RESET_ALL}"
+OBSTACLE_TILE = f"{Back.RED}  {Style.RESET_ALL}"
+EMPTY_TILE = f"{Back.WHITE}  {Style.RESET_ALL}"
+
+# the colored tile of every arena byte: 0 empty, 1 the Agent starting position (empty when the Agent is elsewhere), 2 the Exit, 3 an obstacle
+TILES = (EMPTY_TILE, EMPTY_TILE, EXIT_TILE, OBSTACLE_TILE)
+
+
+def colored_tile(arena, agent_pos: tuple, x: int, y: int) -> str:
+    """
+    Function that returns the colored tile of a position of the arena
+
+    Tile contents:
+        the Agent        -> blue
+        2: the Exit      -> green
+        3: the obstacles -> red
+        0: empty         -> white
+
+    Args:
+        arena (np array): the arena grid
+        agent_pos (tuple): the (x, y) position of the Agent
+        x (int): the x coordinate of the position in the arena
+        y (int): the y coordinate of the position in the arena
+
+    Returns:
+        str: the colored tile
+    """
+    if (x, y) == agent_pos:
+        return AGENT_TILE
+    return TILES[arena[x, y]]
+
+
+def frame(arena, agent_pos: tuple) -> str:
+    """
+    Function that builds the whole arena with the Agent, every row with a single join
+
+    Args:
+        arena (np array): the arena grid
+        agent_pos (tuple): the (x, y) position of the Agent
+
+    Returns:
+        str: the arena, a line per row
+    """
+    lines = ["".join([TILES[tile] for tile in row]) for row in arena.tolist()]
+    # the row of the Agent is rebuilt with the Agent tile
+    x, y = agent_pos
+    row = [TILES[tile] for tile in arena[x].tolist()]
+    row[y] = AGENT_TILE
+    lines[x] = "".join(row)
+    return "".join(line + "\n" for line in lines)